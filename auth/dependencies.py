@@ -8,7 +8,8 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
 from auth.jwt_handler import decode_access_token
-from auth.password_manager import verify_password
+from auth.password_manager import verify_password_async
+from auth.principal_cache import principal_cache
 from auth.permission_manager import has_permission
 from models.models import User
 from models.permissions import Permission
@@ -17,27 +18,27 @@ from services.db import get_user_by_username, get_user_by_email
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-def authenticate_user(username: str, password: str) -> User | None:
-    user = get_user_by_username(username)
+async def authenticate_user(username: str, password: str) -> User | None:
+    user = await get_user_by_username(username)
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    if not await verify_password_async(password, user.password_hash):
         return None
     if not user.is_active:
         return None
     return user
 
 
-def authenticate_user_by_email(email: str, password: str) -> User | None:
+async def authenticate_user_by_email(email: str, password: str) -> User | None:
     """
     Authenticate a user via email + password.
     Performs a case-insensitive, trimmed email lookup.
     """
     normalized_email = (email or "").strip().lower()
-    user = get_user_by_email(normalized_email)
+    user = await get_user_by_email(normalized_email)
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    if not await verify_password_async(password, user.password_hash):
         return None
     if not user.is_active:
         return None
@@ -49,10 +50,16 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> Use
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     payload = decode_access_token(token)
-    user = get_user_by_username(payload.get("username", ""))
+    subject = str(payload["sub"])
+    user = principal_cache.get(subject)
 
     if user is None:
-        raise HTTPException(status_code=401, detail="Not authenticated")
+        user = await get_user_by_username(payload.get("username", ""))
+
+        if user is None:
+            raise HTTPException(status_code=401, detail="Not authenticated")
+
+        principal_cache.put(subject, user)
 
     if not user.is_active:
         raise HTTPException(status_code=403, detail="User is inactive")
@@ -1,11 +1,42 @@
 """
 Password management
+
+- Argon2 hashing runs on a bounded thread pool (argon2-cffi releases the GIL),
+  so the async APIs never block the event loop.
 """
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Callable, TypeVar
+
 from pwdlib import PasswordHash
 
+from config.constants import PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_WORKERS
+
+T = TypeVar("T")
+
 password_hash = PasswordHash.recommended()
 
+_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_pending: int = 0
+
+# NOTE: Totals in seconds, exposed via `hasher_stats()`
+_stats: dict[str, int | float] = {
+    "completed": 0,
+    "rejected": 0,
+    "hash_seconds_total": 0.0,
+    "hash_seconds_max": 0.0,
+    "queue_wait_seconds_total": 0.0,
+    "queue_wait_seconds_max": 0.0,
+}
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when `PASSWORD_HASH_MAX_PENDING` hash operations are already in flight."""
+
 
 def hash_password(password: str) -> str:
     return password_hash.hash(password)
@@ -13,3 +44,49 @@ def hash_password(password: str) -> str:
 
 def verify_password(password: str, hashed_password: str) -> bool:
     return password_hash.verify(password, hashed_password)
+
+
+async def _offload(func: Callable[..., T], *args) -> T:
+    """Run `func` on the hashing pool, rejecting fast once the queue is full."""
+    global _pending
+
+    if _pending >= PASSWORD_HASH_MAX_PENDING:
+        _stats["rejected"] += 1
+        raise PasswordHasherBusy("Password hashing queue is full.")
+
+    queued_at = perf_counter()
+
+    def task() -> tuple[T, float, float]:
+        started = perf_counter()
+        result = func(*args)
+        return result, started - queued_at, perf_counter() - started
+
+    _pending += 1
+    try:
+        result, waited, took = await asyncio.wrap_future(_executor.submit(task))
+    finally:
+        _pending -= 1
+
+    _stats["completed"] += 1
+    _stats["hash_seconds_total"] += took
+    _stats["hash_seconds_max"] = max(_stats["hash_seconds_max"], took)
+    _stats["queue_wait_seconds_total"] += waited
+    _stats["queue_wait_seconds_max"] = max(_stats["queue_wait_seconds_max"], waited)
+    return result
+
+
+async def hash_password_async(password: str) -> str:
+    return await _offload(hash_password, password)
+
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    return await _offload(verify_password, password, hashed_password)
+
+
+def hasher_stats() -> dict[str, int | float]:
+    return {
+        **_stats,
+        "pending": _pending,
+        "workers": PASSWORD_HASH_WORKERS,
+        "max_pending": PASSWORD_HASH_MAX_PENDING,
+    }
@@ -0,0 +1,75 @@
+"""
+Principal cache
+
+- In-process LRU/TTL cache of resolved users, keyed by JWT subject.
+"""
+
+from collections import OrderedDict
+from time import monotonic
+
+from config.constants import PRINCIPAL_CACHE_MAX_SIZE, PRINCIPAL_CACHE_TTL_SECONDS
+from models.models import User
+
+
+class PrincipalCache:
+    """
+    Bounded LRU of `User` models with a per-entry TTL.
+
+    Writes through `services.db` invalidate entries in this worker. Other
+    workers pick changes up once the TTL runs out, so `ttl` is the staleness
+    window for role and `is_active` changes.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, User]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, subject: str) -> User | None:
+        entry = self._entries.get(subject)
+
+        if entry is None or monotonic() >= entry[0]:
+            if entry is not None:
+                del self._entries[subject]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(subject)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, subject: str, user: User) -> None:
+        if self.max_size <= 0:
+            return
+
+        self._entries[subject] = (monotonic() + self.ttl, user)
+        self._entries.move_to_end(subject)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, subject: str) -> None:
+        self._entries.pop(subject, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+principal_cache = PrincipalCache(
+    max_size=PRINCIPAL_CACHE_MAX_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,17 @@
+"""
+Record scoping helpers for RBAC.
+"""
+
+from models.models import User
+from models.roles import Role
+
+
+def record_scope(user: User) -> dict:
+    """
+    Return the Mongo filter fragment limiting which patient records a user can read.
+    Staff roles see every record, patients only the one(s) carrying their email.
+    """
+    if user.role != Role.PATIENT:
+        return {}
+
+    return {"email": (user.email or "").strip().lower()}
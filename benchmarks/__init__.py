@@ -0,0 +1,5 @@
+"""
+Benchmarks
+
+- Standalone scripts, run with `python -m benchmarks.<name>`.
+"""
@@ -0,0 +1,81 @@
+"""
+Benchmark - Instrumentation overhead
+
+- Per-request cost of `MetricsMiddleware` (around a bare ASGI endpoint, so only
+  the instrumentation is measured) and per-command cost of the Mongo
+  `CommandListener`. Both should stay within a few microseconds.
+
+Usage : python -m benchmarks.bench_metrics [--requests 100000] [--commands 100000]
+"""
+
+import argparse
+import asyncio
+from time import perf_counter
+from types import SimpleNamespace
+
+from services.metrics import MetricsMiddleware, MongoCommandMetrics
+
+ROUTES: list[SimpleNamespace] = [
+    SimpleNamespace(path=path)
+    for path in ["/records/", "/records/id/{pid}", "/records/stats", "/activities/"]
+]
+
+
+async def endpoint(scope, receive, send) -> None:
+    """Stands in for the app : routes the request and sends an empty JSON body."""
+    scope["route"] = ROUTES[scope["n"] % len(ROUTES)]
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive() -> dict:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message: dict) -> None:
+    pass
+
+
+async def per_request(app, requests: int) -> float:
+    start = perf_counter()
+    for n in range(requests):
+        await app({"type": "http", "method": "GET", "path": "/", "n": n}, receive, send)
+    return (perf_counter() - start) / requests
+
+
+def per_command(listener: MongoCommandMetrics, commands: int) -> float:
+    start = perf_counter()
+    for n in range(commands):
+        event = SimpleNamespace(
+            command_name="find",
+            command={"find": "records"},
+            request_id=n,
+            connection_id=("localhost", 27017),
+            duration_micros=850,
+        )
+        listener.started(event)
+        listener.succeeded(event)
+    return (perf_counter() - start) / commands
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--commands", type=int, default=100_000)
+    args = parser.parse_args()
+
+    bare = asyncio.run(per_request(endpoint, args.requests))
+    instrumented = asyncio.run(per_request(MetricsMiddleware(endpoint), args.requests))
+    command = per_command(MongoCommandMetrics(), args.commands)
+
+    print(f"\nPer request ({args.requests} requests)")
+    print(f"  {'bare endpoint':<28} {bare * 1e6:8.2f} us")
+    print(f"  {'with MetricsMiddleware':<28} {instrumented * 1e6:8.2f} us")
+    print(f"  {'overhead':<28} {(instrumented - bare) * 1e6:8.2f} us")
+
+    print(f"\nPer Mongo command ({args.commands} commands)")
+    print(f"  {'CommandListener':<28} {command * 1e6:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
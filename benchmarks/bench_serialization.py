@@ -0,0 +1,105 @@
+"""
+Benchmark - Response serialization
+
+- Encode time and bytes on the wire for a page of patient records, through the
+  default path (`jsonable_encoder` + stdlib `json`) and the response-model path,
+  with and without orjson, and gzip/brotli sizes of the result.
+
+Usage : python -m benchmarks.bench_serialization [--records 200] [--runs 200]
+"""
+
+import argparse
+import gzip
+import random
+from timeit import timeit
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from config.constants import COMPRESSION_LEVEL, MAX_PAGE_SIZE
+from models.records import RecordPage
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CITIES: list[str] = ["Mumbai", "Delhi", "Kolkata", "Chennai", "Pune", "Jaipur"]
+VERDICTS: list[str] = ["Underweight", "Normal Weight", "Overweight", "Moderately Obese"]
+
+
+def sample_page(size: int) -> dict:
+    """A page shaped like `/records/` output, with plausible values."""
+    records: list[dict] = []
+    for i in range(size):
+        height = round(random.uniform(1.45, 1.95), 2)
+        weight = round(random.uniform(45, 110), 1)
+        records.append(
+            {
+                "pid": f"P{i + 1:07d}",
+                "name": f"Patient {i + 1}",
+                "city": random.choice(CITIES),
+                "age": random.randint(1, 95),
+                "gender": random.choice(["male", "female", "others"]),
+                "height": height,
+                "weight": weight,
+                "bmi": round(weight / height**2, 2),
+                "verdict": random.choice(VERDICTS),
+                "email": f"patient{i + 1}@example.com",
+                "date_of_admission": "2025-01-01T10:00:00+05:30",
+                "date_of_discharge": None,
+                "version": 1,
+            }
+        )
+    return {"records": records, "next_cursor": "eyJwaWQiOiJQMDAwMDIwMCJ9"}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=MAX_PAGE_SIZE)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    page: dict = sample_page(args.records)
+    adapter = TypeAdapter(RecordPage)
+
+    def generic(response_class) -> bytes:
+        return response_class(jsonable_encoder(page)).body
+
+    def modelled(response_class) -> bytes:
+        content = adapter.dump_python(
+            adapter.validate_python(page), mode="json", exclude_unset=True
+        )
+        return response_class(content).body
+
+    cases = [("jsonable_encoder + json", lambda: generic(JSONResponse))]
+    cases.append(("response model + json", lambda: modelled(JSONResponse)))
+    if orjson is not None:
+        cases.append(("jsonable_encoder + orjson", lambda: generic(ORJSONResponse)))
+        cases.append(("response model + orjson", lambda: modelled(ORJSONResponse)))
+    else:
+        print("orjson not installed, skipping orjson cases.")
+
+    print(f"\nEncode time ({args.records} records, {args.runs} runs)")
+    for label, case in cases:
+        took = timeit(case, number=args.runs) / args.runs
+        print(f"  {label:<28} {took * 1000:8.3f} ms")
+
+    body: bytes = modelled(JSONResponse)
+    print("\nBytes on the wire")
+    print(f"  {'identity':<28} {len(body):8d}")
+    print(f"  {'gzip':<28} {len(gzip.compress(body, COMPRESSION_LEVEL)):8d}")
+    if brotli is not None:
+        print(f"  {'br':<28} {len(brotli.compress(body, quality=COMPRESSION_LEVEL)):8d}")
+    else:
+        print("  brotli not installed, skipping br.")
+
+
+if __name__ == "__main__":
+    main()
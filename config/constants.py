@@ -17,9 +17,100 @@ DB: str = getenv("DB", "")
 USERS_COLLECTION: str = getenv("USERS_COLLECTION", "")
 RECORDS_COLLECTION: str = getenv("RECORDS_COLLECTION", "")
 ACTIVITES_COLLECTION: str = getenv("ACTIVITES_COLLECTION", "")
+COUNTERS_COLLECTION: str = getenv("COUNTERS_COLLECTION", "counters")
+CENSUS_COLLECTION: str = getenv("CENSUS_COLLECTION", "census")
+MIGRATIONS_COLLECTION: str = getenv("MIGRATIONS_COLLECTION", "migrations")
+RUN_MIGRATIONS_ON_STARTUP: bool = (
+    getenv("RUN_MIGRATIONS_ON_STARTUP", "true").lower() == "true"
+)
+
+
+# NOTE: Pagination
+DEFAULT_PAGE_SIZE = int(getenv("DEFAULT_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(getenv("MAX_PAGE_SIZE", "200"))
+EXPORT_BATCH_SIZE = int(getenv("EXPORT_BATCH_SIZE", "1000"))
+
+
+# NOTE: Bulk operations
+BULK_MAX_ITEMS = int(getenv("BULK_MAX_ITEMS", "10000"))
+BULK_CHUNK_SIZE = int(getenv("BULK_CHUNK_SIZE", "1000"))
+
+
+# NOTE: Patient IDs
+PID_BLOCK_SIZE = int(getenv("PID_BLOCK_SIZE", "20"))
+
+
+# NOTE: Name search
+NAME_SEARCH_DEFAULT_LIMIT = int(getenv("NAME_SEARCH_DEFAULT_LIMIT", "20"))
+NAME_SEARCH_MIN_SIMILARITY = float(getenv("NAME_SEARCH_MIN_SIMILARITY", "0.3"))
+NAME_SEARCH_MIN_LENGTH = int(getenv("NAME_SEARCH_MIN_LENGTH", "3"))
+NAME_SEARCH_MAX_CANDIDATES = int(getenv("NAME_SEARCH_MAX_CANDIDATES", "1000"))
+# NOTE: Full rebuilds (to pick up other workers' writes) are off unless set
+NAME_INDEX_REFRESH_SECONDS = float(getenv("NAME_INDEX_REFRESH_SECONDS", "0"))
+
+
+# NOTE: Counters
+RECENT_ADMISSIONS_RECONCILE_SECONDS = float(
+    getenv("RECENT_ADMISSIONS_RECONCILE_SECONDS", "60")
+)
+
+
+# NOTE: Daily census
+CENSUS_MAX_DAYS = int(getenv("CENSUS_MAX_DAYS", "366"))
+
+
+# NOTE: Response cache (backend : memory / redis / none)
+CACHE_BACKEND: str = getenv("CACHE_BACKEND", "memory")
+CACHE_REDIS_URL: str = getenv("CACHE_REDIS_URL", "")
+CACHE_MAX_BYTES = int(getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_TTL_RECORD = float(getenv("CACHE_TTL_RECORD", "30"))
+CACHE_TTL_LIST = float(getenv("CACHE_TTL_LIST", "5"))
+CACHE_TTL_SEARCH = float(getenv("CACHE_TTL_SEARCH", "10"))
+CACHE_TTL_STATS = float(getenv("CACHE_TTL_STATS", "30"))
+
+
+# NOTE: Response encoding (orjson / brotli are used only when installed)
+FAST_JSON_RESPONSES: bool = getenv("FAST_JSON_RESPONSES", "false").lower() == "true"
+COMPRESSION_MIN_SIZE = int(getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_LEVEL = int(getenv("COMPRESSION_LEVEL", "5"))
+
+
+# NOTE: Prometheus metrics at `/metrics` (request and Mongo command timings)
+METRICS_ENABLED: bool = getenv("METRICS_ENABLED", "true").lower() == "true"
+
+
+# NOTE: Activity log writer
+ACTIVITY_QUEUE_MAX_SIZE = int(getenv("ACTIVITY_QUEUE_MAX_SIZE", "10000"))
+ACTIVITY_BATCH_SIZE = int(getenv("ACTIVITY_BATCH_SIZE", "500"))
+ACTIVITY_FLUSH_INTERVAL_SECONDS = float(getenv("ACTIVITY_FLUSH_INTERVAL_SECONDS", "1"))
+ACTIVITY_OVERFLOW_POLICY: str = getenv("ACTIVITY_OVERFLOW_POLICY", "block")
+ACTIVITY_SPILL_PATH: str = getenv("ACTIVITY_SPILL_PATH", "activity_spill.jsonl")
+ACTIVITY_WRITE_CONCERN_W = int(getenv("ACTIVITY_WRITE_CONCERN_W", "1"))
+
+
+# NOTE: Live activity feed
+ACTIVITY_STREAM_BUFFER_SIZE = int(getenv("ACTIVITY_STREAM_BUFFER_SIZE", "256"))
+ACTIVITY_STREAM_REPLAY_SIZE = int(getenv("ACTIVITY_STREAM_REPLAY_SIZE", "1000"))
+ACTIVITY_STREAM_HEARTBEAT_SECONDS = float(
+    getenv("ACTIVITY_STREAM_HEARTBEAT_SECONDS", "15")
+)
+
+
+# NOTE: Activity log retention (off by default : 0 days keeps everything in Mongo)
+# NOTE: Archiving also needs an explicit ACTIVITY_ARCHIVE_DIR, on persistent storage
+ACTIVITY_RETENTION_DAYS = float(getenv("ACTIVITY_RETENTION_DAYS", "0"))
+ACTIVITY_ARCHIVE_DIR: str = getenv("ACTIVITY_ARCHIVE_DIR", "")
+ACTIVITY_ARCHIVE_BATCH_SIZE = int(getenv("ACTIVITY_ARCHIVE_BATCH_SIZE", "1000"))
+ACTIVITY_ARCHIVE_INTERVAL_SECONDS = float(
+    getenv("ACTIVITY_ARCHIVE_INTERVAL_SECONDS", "3600")
+)
 
 
 # NOTE: Auth. env. vars.
 JWT_SECRET = getenv("JWT_SECRET", "dev-secret-change-me")
 JWT_ALGORITHM = getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = float(getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+PRINCIPAL_CACHE_MAX_SIZE = int(getenv("PRINCIPAL_CACHE_MAX_SIZE", "1024"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+PASSWORD_HASH_WORKERS = int(getenv("PASSWORD_HASH_WORKERS", "4"))
+PASSWORD_HASH_MAX_PENDING = int(getenv("PASSWORD_HASH_MAX_PENDING", "64"))
@@ -0,0 +1,12 @@
+"""
+Request metrics
+"""
+
+from config.constants import METRICS_ENABLED
+from services.metrics import MetricsMiddleware
+
+
+def metrics_middleware(app):
+    # NOTE: Added last, so it is outermost and times compression too
+    if METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
@@ -0,0 +1,58 @@
+"""
+Response encoding
+
+- Optional fast JSON rendering (orjson) and negotiated response compression
+  (brotli when `brotli-asgi` is installed, gzip otherwise).
+"""
+
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from config.constants import (
+    COMPRESSION_LEVEL,
+    COMPRESSION_MIN_SIZE,
+    FAST_JSON_RESPONSES,
+)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+
+def response_class() -> type[JSONResponse]:
+    """App-wide default response class : orjson when opted in and installed."""
+    if not FAST_JSON_RESPONSES:
+        return JSONResponse
+
+    if orjson is None:
+        print("\nWarning: orjson is not installed, using the standard JSON encoder.\n")
+        return JSONResponse
+
+    return ORJSONResponse
+
+
+def compression_middleware(app):
+    # NOTE: Small bodies aren't worth the CPU, and grow once framed
+    if BrotliMiddleware is not None:
+        app.add_middleware(
+            BrotliMiddleware,
+            quality=COMPRESSION_LEVEL,
+            minimum_size=COMPRESSION_MIN_SIZE,
+            gzip_fallback=True,
+            # NOTE: Event streams must be flushed per event, not buffered
+            excluded_handlers=[r"^/activities/stream"],
+        )
+        return
+
+    # NOTE: Starlette's gzip already leaves `text/event-stream` uncompressed
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=COMPRESSION_MIN_SIZE,
+        compresslevel=COMPRESSION_LEVEL,
+    )
@@ -2,11 +2,28 @@
 App. - Root
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from pymongo.errors import PyMongoError
 
+from config.constants import RUN_MIGRATIONS_ON_STARTUP
 from config.cors_setting import cors_middleware
+from config.metrics_setting import metrics_middleware
+from config.response_setting import compression_middleware, response_class
+from services.db import (
+    close_client,
+    start_activity_archiver,
+    start_activity_writer,
+    start_name_index,
+    stop_activity_archiver,
+    stop_activity_writer,
+    stop_name_index,
+)
+from services.migrations import print_report, run_migrations
 
 from routes.health import router as health_router
+from routes.metrics import router as metrics_router
 from routes.auth import router as auth_router
 
 from routes.add_records import router as admit_patient_router
@@ -15,20 +32,48 @@ from routes.update_records import router as update_records_router
 from routes.rem_records import router as discharge_patient_router
 from routes.activities import router as activities_router
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if RUN_MIGRATIONS_ON_STARTUP:
+        try:
+            print_report(await run_migrations())
+        except PyMongoError as e:
+            print(f"\nError running migrations : {e}\n")
+
+    await start_activity_writer()
+    await start_name_index()
+    await start_activity_archiver()
+    yield
+    await stop_activity_archiver()
+    await stop_name_index()
+    await stop_activity_writer()
+    await close_client()
+
+
 # App.
 app = FastAPI(
     title="Patient Management System 🏥",
     description="A microservice for management of patient records.",
     version="1.2.0",
+    lifespan=lifespan,
+    default_response_class=response_class(),
 )
 
 # CORS
 cors_middleware(app)
 
+# Compression
+compression_middleware(app)
+
+# Metrics
+metrics_middleware(app)
+
 # Routers
 
 # NOTE: Health checks
 app.include_router(health_router)
+app.include_router(metrics_router)
 
 # Record Mgmt.
 app.include_router(fetch_records_router)
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel, EmailStr
 
 from models.roles import Role
@@ -14,6 +16,7 @@ class UserOut(BaseModel):
     email: str
     role: Role
     is_active: bool
+    pid: Optional[str] = None
 
 
 class RegisterRequest(BaseModel):
@@ -16,6 +16,10 @@ from models.roles import Role
 load_dotenv()
 TIMEZONE: str = environ.get("TIMEZONE", "Asia/Kolkata")
 
+ActionType = Literal[
+    "patient_admitted", "patient_updated", "patient_discharged", "system_check"
+]
+
 
 class Patient(BaseModel):
     """Model for patient record data validation."""
@@ -37,7 +41,7 @@ class Patient(BaseModel):
         float, Field(..., gt=0, description="Weight of the patient (in kilograms)")
     ]
     pid: Annotated[
-        str, Field(..., min_length=4, max_length=4, description="Patient ID")
+        str, Field(..., min_length=4, max_length=8, description="Patient ID")
     ]
     date_of_discharge: Annotated[
         Optional[date], Field(None, description="Date discharge")
@@ -109,7 +113,7 @@ class PatientUpdate(BaseModel):
         Field(None, gt=0, description="Weight of the patient (in kilograms)"),
     ]
     pid: Annotated[
-        Optional[str], Field(None, min_length=4, max_length=4, description="Patient ID")
+        Optional[str], Field(None, min_length=4, max_length=8, description="Patient ID")
     ]
     date_of_admission: Annotated[
         Optional[date], Field(None, description="Date of admission")
@@ -160,10 +164,7 @@ class Activity(BaseModel):
     """Model for activity log entries."""
 
     action_type: Annotated[
-        Literal[
-            "patient_admitted", "patient_updated", "patient_discharged", "system_check"
-        ],
-        Field(..., description="Type of action performed by user"),
+        ActionType, Field(..., description="Type of action performed by user")
     ]
     patient_id: Annotated[
         Optional[str], Field(None, description="Patient ID (if applicable)")
@@ -193,3 +194,4 @@ class User(BaseModel):
     password_hash: str
     role: Role
     is_active: bool = True
+    pid: Optional[str] = None
@@ -0,0 +1,33 @@
+"""
+Models - Record responses
+"""
+
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class PatientRecord(BaseModel):
+    """Model for a stored patient record, as returned by the fetch endpoints."""
+
+    # NOTE: All optional, so legacy documents still serialize (unset fields are omitted)
+    pid: Optional[str] = None
+    name: Optional[str] = None
+    city: Optional[str] = None
+    age: Optional[int] = None
+    gender: Optional[str] = None
+    height: Optional[float] = None
+    weight: Optional[float] = None
+    bmi: Optional[float] = None
+    verdict: Optional[str] = None
+    email: Optional[str] = None
+    date_of_admission: Optional[str] = None
+    date_of_discharge: Optional[str] = None
+    version: Optional[int] = None
+
+
+class RecordPage(BaseModel):
+    """Model for one page of patient records."""
+
+    records: list[PatientRecord]
+    next_cursor: Optional[str] = None
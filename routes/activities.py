@@ -4,27 +4,131 @@ Activity routes
 - Router for fetching system activities
 """
 
-from typing import Annotated
+import asyncio
+import json
+from datetime import date, datetime
+from typing import Annotated, AsyncIterator
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pytz import timezone as tz
 
 from auth.dependencies import get_current_user, require_permission
-from models.models import User
+from config.constants import (
+    ACTIVITY_STREAM_HEARTBEAT_SECONDS,
+    ACTIVITY_STREAM_REPLAY_SIZE,
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    TIMEZONE,
+)
+from models.models import ActionType, User
 from models.permissions import Permission
-from services.db import get_recent_activities
+from utils.utils import decode_cursor, encode_cursor
+from services.activity_hub import Subscription
+from services.db import (
+    activity_hub,
+    activity_view,
+    get_activities,
+    get_activities_after,
+    get_archived_activities,
+    get_recent_activities,
+)
 
 router = APIRouter(prefix="/activities", tags=["Activities"])
 
 
+def localized(moment: datetime | None) -> datetime | None:
+    """Read timestamps without an offset as local (`TIMEZONE`) time."""
+    if moment is None or moment.tzinfo is not None:
+        return moment
+    return tz(TIMEZONE).localize(moment)
+
+
+def read_activity_cursor(cursor: str | None) -> tuple[datetime, ObjectId] | None:
+    """Decode a `cursor` query param into the `(timestamp, _id)` it points after."""
+    if cursor is None:
+        return None
+
+    position = decode_cursor(cursor)
+    try:
+        return (
+            datetime.fromisoformat(position["timestamp"]),
+            ObjectId(position["id"]),
+        )
+    except (KeyError, TypeError, ValueError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+
+
+def read_archive_cursor(cursor: str | None) -> tuple[str, int] | None:
+    """Decode an archive `cursor` query param into the `(day, position)` it points after."""
+    if cursor is None:
+        return None
+
+    position = decode_cursor(cursor)
+    try:
+        day = date.fromisoformat(position["day"]).isoformat()
+        if not isinstance(position["position"], int):
+            raise ValueError(position["position"])
+        return day, position["position"]
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+
+
+@router.get("/", dependencies=[Depends(require_permission(Permission.VIEW_ACTIVITIES))])
+async def fetch_activities(
+    current_user: Annotated[User, Depends(get_current_user)],
+    patient_id: str | None = Query(None, description="Only this patient's activities."),
+    action_type: ActionType | None = Query(None, description="Only this action type."),
+    since: datetime | None = Query(
+        None, description="From this time (inclusive, ISO 8601)."
+    ),
+    until: datetime | None = Query(
+        None, description="Up to this time (exclusive, ISO 8601)."
+    ),
+    limit: int = Query(
+        DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size."
+    ),
+    cursor: str | None = Query(
+        None, description="Opaque cursor from the previous page's `next_cursor`."
+    ),
+):
+    """
+    Page through system activities, newest first. Timestamps without an offset
+    are read in the server's timezone.
+    """
+    data: list[dict] | None = await get_activities(
+        limit + 1,
+        patient_id,
+        action_type,
+        localized(since),
+        localized(until),
+        read_activity_cursor(cursor),
+    )
+
+    if data is None:
+        raise HTTPException(status_code=500, detail="Failed to fetch activities.")
+
+    next_cursor: str | None = None
+    if len(data) > limit:
+        data = data[:limit]
+        next_cursor = encode_cursor(
+            {"timestamp": data[-1]["timestamp"], "id": data[-1]["id"]}
+        )
+
+    return {"activities": data, "next_cursor": next_cursor}
+
+
 @router.get(
     "/recent", dependencies=[Depends(require_permission(Permission.VIEW_ACTIVITIES))]
 )
-def fetch_recent_activities(
+async def fetch_recent_activities(
     current_user: Annotated[User, Depends(get_current_user)],
     limit: int = Query(10, ge=1, le=50),
 ):
     """Fetch recent system activities."""
-    data: list[dict] | None = get_recent_activities(limit)
+    data: list[dict] | None = await get_recent_activities(limit)
 
     if data is None:
         raise HTTPException(
@@ -32,3 +136,113 @@ def fetch_recent_activities(
         )
 
     return {"activities": data, "total": len(data)}
+
+
+@router.get(
+    "/archive", dependencies=[Depends(require_permission(Permission.VIEW_ACTIVITIES))]
+)
+async def fetch_archived_activities(
+    current_user: Annotated[User, Depends(get_current_user)],
+    start: date = Query(..., alias="from", description="First day (YYYY-MM-DD)."),
+    end: date = Query(..., alias="to", description="Last day (YYYY-MM-DD)."),
+    patient_id: str | None = Query(None, description="Only this patient's activities."),
+    action_type: ActionType | None = Query(None, description="Only this action type."),
+    limit: int = Query(
+        DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size."
+    ),
+    cursor: str | None = Query(
+        None, description="Opaque cursor from the previous page's `next_cursor`."
+    ),
+):
+    """
+    Page through activities moved out of the database by the retention policy,
+    oldest first. Read straight from the compressed daily archive segments.
+    """
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' cannot be before 'from'.")
+
+    result = await get_archived_activities(
+        start, end, limit, patient_id, action_type, read_archive_cursor(cursor)
+    )
+
+    if result is None:
+        raise HTTPException(
+            status_code=500, detail="Failed to fetch archived activities."
+        )
+
+    data, after = result
+    next_cursor: str | None = None
+    if after is not None:
+        next_cursor = encode_cursor({"day": after[0], "position": after[1]})
+
+    return {"activities": data, "next_cursor": next_cursor}
+
+
+def sse_event(doc: dict) -> str:
+    """Format an activity as a server-sent event, with its ID for resuming."""
+    view = activity_view(doc)
+    return f"id: {view['id']}\nevent: activity\ndata: {json.dumps(view, default=str)}\n\n"
+
+
+async def activity_events(
+    subscription: Subscription, backlog: list[dict], request: Request
+) -> AsyncIterator[str]:
+    """Missed entries first, then live ones, with keep-alives while idle."""
+    sent: set = set()
+    try:
+        for doc in backlog:
+            sent.add(doc["_id"])
+            yield sse_event(doc)
+
+        # NOTE: Evicted (too slow) streams end, and the client resumes from its last ID
+        while not subscription.evicted:
+            try:
+                doc = await asyncio.wait_for(
+                    subscription.queue.get(), ACTIVITY_STREAM_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keep-alive\n\n"
+                continue
+
+            if doc["_id"] not in sent:
+                yield sse_event(doc)
+    finally:
+        activity_hub.unsubscribe(subscription)
+
+
+@router.get(
+    "/stream", dependencies=[Depends(require_permission(Permission.VIEW_ACTIVITIES))]
+)
+async def stream_activities(
+    request: Request,
+    current_user: Annotated[User, Depends(get_current_user)],
+    last_event_id: Annotated[str | None, Header()] = None,
+):
+    """
+    Live feed of system activities as server-sent events. Reconnects send
+    `Last-Event-ID` and get the entries they missed before the live ones.
+    """
+    last_id: ObjectId | None = None
+    if last_event_id:
+        try:
+            last_id = ObjectId(last_event_id)
+        except (InvalidId, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID header.")
+
+    # NOTE: Subscribed before reading the backlog, so nothing falls in between
+    subscription: Subscription = activity_hub.subscribe()
+    backlog: list[dict] = []
+
+    if last_id is not None:
+        backlog = activity_hub.replay_after(last_id)
+        if backlog is None:
+            backlog = await get_activities_after(last_id, ACTIVITY_STREAM_REPLAY_SIZE)
+        backlog = backlog or []
+
+    return StreamingResponse(
+        activity_events(subscription, backlog, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
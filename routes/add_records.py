@@ -4,26 +4,38 @@ Add records
 - Router for adding patient records
 """
 
+import json
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import ValidationError
 
 from auth.dependencies import get_current_user, require_permission
+from config.constants import BULK_MAX_ITEMS
 from models.models import Patient, User
 from models.permissions import Permission
-from utils.utils import new_pid
-from services.db import add_patient, log_activity
+from utils.utils import new_pid, validation_message
+from services.db import (
+    add_patient,
+    add_patients,
+    link_user_to_patient,
+    log_activities,
+    log_activity,
+)
+from services.pid_allocator import format_pid, pid_allocator
 
 router = APIRouter(prefix="/admit", tags=["Admit_Patients"])
 
+NOT_AN_OBJECT: str = "Each row must be a JSON object."
+
 
 @router.post("", dependencies=[Depends(require_permission(Permission.ADMIT_PATIENT))])
-def new_patient(
+async def new_patient(
     patient_data: dict,
     current_user: Annotated[User, Depends(get_current_user)],
 ):
     try:
-        npid: str | None = new_pid()
+        npid: str | None = await new_pid()
 
         if npid is None:
             raise HTTPException(
@@ -39,12 +51,15 @@ def new_patient(
         patient_data["pid"] = npid
         temp: Patient = Patient(**patient_data)
 
-        res = add_patient(temp)
+        res = await add_patient(temp)
         if res is None:
             raise HTTPException(status_code=500, detail="Failed to add patient record.")
 
+        # NOTE: Link an already-registered patient account to the new record
+        await link_user_to_patient(temp.email, npid)
+
         # Log the activity
-        log_activity(
+        await log_activity(
             action_type="patient_admitted",
             patient_id=npid,
             patient_name=patient_data.get("name", "Unknown"),
@@ -56,3 +71,119 @@ def new_patient(
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error : {e}")
+
+
+def parse_row(raw: bytes | str) -> dict | str:
+    """Parse one NDJSON line. Returns the error message if it isn't a JSON object."""
+    try:
+        row = json.loads(raw)
+    except ValueError as e:
+        return f"Invalid JSON : {e}"
+    return row if isinstance(row, dict) else NOT_AN_OBJECT
+
+
+async def read_rows(request: Request) -> list[dict | str]:
+    """Read a JSON array, or an NDJSON stream (`application/x-ndjson`), of patients."""
+    rows: list[dict | str] = []
+
+    if "ndjson" in request.headers.get("content-type", ""):
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            rows.extend(parse_row(line) for line in lines if line.strip())
+            if len(rows) > BULK_MAX_ITEMS:
+                break
+        if buffer.strip():
+            rows.append(parse_row(buffer))
+    else:
+        try:
+            body = await request.json()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail="Invalid JSON body.") from e
+        if not isinstance(body, list):
+            raise HTTPException(
+                status_code=400, detail="Request body must be a JSON array."
+            )
+        rows = [row if isinstance(row, dict) else NOT_AN_OBJECT for row in body]
+
+    if len(rows) > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413, detail=f"At most {BULK_MAX_ITEMS} patients per request."
+        )
+
+    return rows
+
+
+def validate_row(row: dict | str) -> Patient | str:
+    """Validate one row into a `Patient` (PID assigned later). Returns the error message on failure."""
+    if isinstance(row, str):
+        return row
+
+    if "email" in row and row["email"]:
+        row["email"] = str(row["email"]).strip().lower()
+
+    try:
+        return Patient(**{**row, "pid": format_pid(0)})
+    except ValidationError as e:
+        return validation_message(e)
+
+
+@router.post(
+    "/bulk", dependencies=[Depends(require_permission(Permission.ADMIT_PATIENT))]
+)
+async def bulk_admit(
+    request: Request,
+    current_user: Annotated[User, Depends(get_current_user)],
+):
+    """
+    Admit many patients at once from a JSON array or an NDJSON stream.
+    Valid rows get a contiguous block of PIDs and are inserted in chunks.
+    Returns a per-row outcome, in request order.
+    """
+    validated: list[Patient | str] = [validate_row(row) for row in await read_rows(request)]
+    patients: list[Patient] = [p for p in validated if isinstance(p, Patient)]
+
+    pids: list[str] | None = await pid_allocator.block(len(patients)) if patients else []
+    if pids is None:
+        raise HTTPException(
+            status_code=500, detail="Could not generate new patient IDs."
+        )
+
+    for patient, pid in zip(patients, pids):
+        patient.pid = pid
+
+    failures: list[str | None] | None = await add_patients(patients) if patients else []
+    if failures is None:
+        raise HTTPException(status_code=500, detail="Failed to add patient records.")
+
+    # NOTE: `failures` lines up with `patients`, i.e. the valid rows in request order
+    pending_failures = iter(failures)
+    results: list[dict] = []
+    admitted: list[Patient] = []
+
+    for index, item in enumerate(validated):
+        error: str | None = item if isinstance(item, str) else next(pending_failures)
+        if error is None:
+            admitted.append(item)
+            results.append({"index": index, "status": "admitted", "pid": item.pid})
+        else:
+            results.append({"index": index, "status": "error", "error": error})
+
+    await log_activities(
+        [
+            {
+                "action_type": "patient_admitted",
+                "patient_id": patient.pid,
+                "patient_name": patient.name,
+                "description": "Patient record created in system",
+            }
+            for patient in admitted
+        ]
+    )
+
+    return {
+        "admitted": len(admitted),
+        "failed": len(results) - len(admitted),
+        "results": results,
+    }
@@ -18,7 +18,8 @@ from auth.dependencies import (
     get_current_user,
 )
 from auth.jwt_handler import create_access_token
-from services.db import create_user, user_exists
+from auth.password_manager import PasswordHasherBusy
+from services.db import create_user, get_patient_pid_by_email, user_exists
 
 from models.models import User
 from models.roles import Role
@@ -26,6 +27,12 @@ from models.auth import Token, UserOut, RegisterRequest
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+hasher_busy_exception = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Server is busy. Please try again shortly.",
+    headers={"Retry-After": "1"},
+)
+
 
 class LoginRequest(BaseModel):
     """Login payload — email-based authentication."""
@@ -78,10 +85,15 @@ async def login_for_access_token(request: Request):
 
     # Resolve user by email (preferred) or fall back to username (legacy)
     user: User | None = None
-    if email:
-        user = authenticate_user_by_email(str(email).strip().lower(), password)
-    if user is None and username:
-        user = authenticate_user(username, password)
+    try:
+        if email:
+            user = await authenticate_user_by_email(
+                str(email).strip().lower(), password
+            )
+        if user is None and username:
+            user = await authenticate_user(username, password)
+    except PasswordHasherBusy as exc:
+        raise hasher_busy_exception from exc
 
     if user is None:
         raise HTTPException(
@@ -141,19 +153,24 @@ async def register_user(request: Request):
         raise HTTPException(status_code=400, detail="Password is required.")
 
     normalized_email = str(payload.email).strip().lower()
-    if user_exists(payload.username, normalized_email):
+    if await user_exists(payload.username, normalized_email):
         raise HTTPException(status_code=409, detail="User already exists.")
 
-    created_user = create_user(
-        {
-            "id": payload.username,
-            "username": payload.username,
-            "email": normalized_email,
-            "password_hash": payload.password,
-            "role": payload.role.value,
-            "is_active": True,
-        }
-    )
+    try:
+        created_user = await create_user(
+            {
+                "id": payload.username,
+                "username": payload.username,
+                "email": normalized_email,
+                "password_hash": payload.password,
+                "role": payload.role.value,
+                "is_active": True,
+                # NOTE: Link to the patient record if one was admitted before registration
+                "pid": await get_patient_pid_by_email(normalized_email),
+            }
+        )
+    except PasswordHasherBusy as exc:
+        raise hasher_busy_exception from exc
 
     if created_user is None:
         raise HTTPException(status_code=500, detail="Failed to create user.")
@@ -162,5 +179,5 @@ async def register_user(request: Request):
 
 
 @router.get("/me", response_model=UserOut)
-def get_authenticated_user(current_user: Annotated[User, Depends(get_current_user)]):
+async def get_authenticated_user(current_user: Annotated[User, Depends(get_current_user)]):
     return UserOut(**current_user.model_dump())
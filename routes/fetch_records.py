@@ -4,59 +4,175 @@ Fetch records
 - Router for fetching patient records
 """
 
-from typing import Annotated
+import csv
+import json
+from datetime import date
+from io import StringIO
+from typing import Annotated, AsyncIterator, Literal
 
-from fastapi import APIRouter, Depends, Path, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, Path, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 
 from auth.dependencies import get_current_user, require_permission
-from models.models import User
+from auth.scope_manager import record_scope
+from models.models import Patient, User
+from models.records import PatientRecord, RecordPage
 from models.permissions import Permission
 from models.roles import Role
-from utils.utils import sort_fields
+from config.constants import (
+    CACHE_TTL_LIST,
+    CACHE_TTL_RECORD,
+    CACHE_TTL_SEARCH,
+    CACHE_TTL_STATS,
+    CENSUS_MAX_DAYS,
+    DEFAULT_PAGE_SIZE,
+    EXPORT_BATCH_SIZE,
+    MAX_PAGE_SIZE,
+    NAME_SEARCH_DEFAULT_LIMIT,
+    NAME_SEARCH_MIN_LENGTH,
+)
+from utils.utils import (
+    changes_etag,
+    check_not_modified,
+    decode_cursor,
+    encode_cursor,
+    parse_fields,
+    record_etag,
+    sort_fields,
+)
+from services.cache import record_cache
+from services.stats import get_record_stats, stats_filter
 from services.db import (
     get_all_patients,
     get_patient_by_id,
+    get_patient_version,
+    get_records_change_count,
     get_patients_by_name,
-    get_recent_admissions,
+    count_recent_admissions,
+    get_census,
     sort_records_by_param,
     get_patients_by_name_fuzzy,
+    patients_cursor,
 )
 
 router = APIRouter(prefix="/records", tags=["Fetch_Records"])
 
+EXPORT_FIELDS: list[str] = [*Patient.model_fields, *Patient.model_computed_fields]
+
+FIELDS_DESCRIPTION: str = (
+    "Comma-separated fields to return (e.g. `pid,name,verdict`). "
+    "`pid` and the sort field are always included."
+)
+
 
-def filter_records_for_user(records: list[dict] | None, current_user: User):
-    if records is None:
+def read_cursor(cursor: str | None, sort_by: str, order: str) -> dict | None:
+    """
+    Decode a `cursor` query param, rejecting ones issued for a different ordering
+    or holding anything but a PID string and a number (they end up in a query).
+    """
+    if cursor is None:
         return None
 
-    if current_user.role != Role.PATIENT:
-        return records
+    position = decode_cursor(cursor)
+    if (
+        position is None
+        or position.get("sort_by") != sort_by
+        or position.get("order") != order
+        or not isinstance(position.get("pid"), str)
+    ):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
 
-    user_email = (current_user.email or "").strip().lower()
-    return [
-        record
-        for record in records
-        if str(record.get("email", "")).strip().lower() == user_email
-    ]
+    # NOTE: Else a value like `{"$ne": null}` would be an operator in the keyset filter
+    value = position.get("value")
+    if sort_by != "pid" and (
+        not isinstance(value, (int, float)) or isinstance(value, bool)
+    ):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
 
+    return position
 
-@router.get("/me", dependencies=[Depends(require_permission(Permission.VIEW_PATIENT))])
-def view_my_record(current_user: Annotated[User, Depends(get_current_user)]):
+
+def paginate(
+    records: list[dict], limit: int, sort_by: str, order: str
+) -> tuple[list[dict], str | None]:
+    """Trim a `limit + 1` result down to one page and build the cursor for the next."""
+    if len(records) <= limit:
+        return records, None
+
+    page = records[:limit]
+    last = page[-1]
+    position: dict = {"sort_by": sort_by, "order": order, "pid": last["pid"]}
+
+    if sort_by != "pid":
+        position["value"] = last.get(sort_by)
+
+    return page, encode_cursor(position)
+
+
+async def tag_listing(response: Response, if_none_match: str | None) -> int | None:
+    """
+    Tag a listing with the records change count, answering 304 if the client's copy
+    is current. Returns the count (or `None` if unavailable) to key the cache on.
+    """
+    # NOTE: Read before the page, so the tag is never newer than the data it labels
+    changes: int | None = await get_records_change_count()
+    if changes is None:
+        return None
+
+    etag: str = changes_etag(changes)
+    check_not_modified(if_none_match, etag)
+
+    response.headers["ETag"] = etag
+    # NOTE: Pages differ per caller scope, so shared caches must not reuse them
+    response.headers["Cache-Control"] = "private, no-cache"
+    return changes
+
+
+def pick(record: dict, fields: list[str] | None) -> dict:
+    """Trim a whole (cached) record down to a sparse fieldset, keeping its `pid`."""
+    if fields is None:
+        return record
+    return {k: v for k, v in record.items() if k == "pid" or k in fields}
+
+
+@router.get(
+    "/me",
+    dependencies=[Depends(require_permission(Permission.VIEW_PATIENT))],
+    response_model=PatientRecord,
+    response_model_exclude_unset=True,
+)
+async def view_my_record(
+    current_user: Annotated[User, Depends(get_current_user)],
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+):
     """
     Return the patient record associated with the currently authenticated patient.
     Restricted to the PATIENT role.
     """
+    selected: list[str] | None = parse_fields(fields)
+
     if current_user.role != Role.PATIENT:
         raise HTTPException(
             status_code=403,
             detail="Only patients can access this endpoint.",
         )
 
-    data: list[dict] | None = get_all_patients()
+    data: list[dict] | None = None
+    scope: dict = record_scope(current_user)
+
+    # NOTE: Linked accounts resolve with a single lookup by PID, still scoped to
+    # their email, since a record's email can change after the account was linked
+    if current_user.pid:
+        record: dict | str | None = await get_patient_by_id(current_user.pid, scope)
+        if isinstance(record, dict):
+            data = [record]
+
+    # NOTE: Accounts not linked yet fall back to their (indexed) email
     if data is None:
-        raise HTTPException(status_code=500, detail="Failed to fetch patient records.")
+        data = await get_all_patients(1, scope=scope)
 
-    data = filter_records_for_user(data, current_user)
+    if data is None:
+        raise HTTPException(status_code=500, detail="Failed to fetch patient records.")
 
     if not data:
         raise HTTPException(
@@ -64,35 +180,163 @@ def view_my_record(current_user: Annotated[User, Depends(get_current_user)]):
             detail="No patient record is associated with your account yet.",
         )
 
-    return data[0]
+    return pick(data[0], selected)
 
 
-@router.get("/", dependencies=[Depends(require_permission(Permission.VIEW_PATIENT))])
-def view(current_user: Annotated[User, Depends(get_current_user)]):
-    data: list[dict] | None = get_all_patients()
+@router.get(
+    "/",
+    dependencies=[Depends(require_permission(Permission.VIEW_PATIENT))],
+    response_model=RecordPage,
+    response_model_exclude_unset=True,
+)
+async def view(
+    current_user: Annotated[User, Depends(get_current_user)],
+    response: Response,
+    limit: int = Query(
+        DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size."
+    ),
+    cursor: str | None = Query(
+        None, description="Opaque cursor from the previous page's `next_cursor`."
+    ),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    if_none_match: Annotated[str | None, Header()] = None,
+):
+    """
+    Page through patient records. Send the previous response's ETag in
+    `If-None-Match` to get a bodiless 304 when no record has changed since.
+    """
+    selected: list[str] | None = parse_fields(fields)
+    position: dict | None = read_cursor(cursor, "pid", "asc")
+    after: str | None = position["pid"] if position else None
+    scope: dict = record_scope(current_user)
+    changes: int | None = await tag_listing(response, if_none_match)
+
+    data: list[dict] | None = await record_cache.fetch(
+        "list",
+        {"limit": limit, "after": after, "fields": selected},
+        scope,
+        CACHE_TTL_LIST,
+        lambda: get_all_patients(limit + 1, after, scope=scope, fields=selected),
+        generation=changes,
+    )
 
     if data is None:
         raise HTTPException(status_code=500, detail="Failed to fetch patient records.")
 
-    data = filter_records_for_user(data, current_user)
+    data, next_cursor = paginate(data, limit, "pid", "asc")
+
+    return {"records": data, "next_cursor": next_cursor}
+
+
+async def export_rows(
+    cursor, fmt: str, columns: list[str] = EXPORT_FIELDS
+) -> AsyncIterator[str]:
+    """Serialize a records cursor into NDJSON / CSV chunks of `EXPORT_BATCH_SIZE` rows."""
+    buffer = StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    rows: int = 0
+
+    if fmt == "csv":
+        writer.writeheader()
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    try:
+        async for record in cursor:
+            if fmt == "csv":
+                writer.writerow(record)
+            else:
+                buffer.write(json.dumps(record, default=str))
+                buffer.write("\n")
+
+            rows += 1
+            if rows == EXPORT_BATCH_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                rows = 0
+
+        if rows:
+            yield buffer.getvalue()
+    finally:
+        # NOTE: Release the server-side cursor if the client disconnects early
+        await cursor.close()
+
+
+@router.get(
+    "/export", dependencies=[Depends(require_permission(Permission.VIEW_PATIENT))]
+)
+async def export_records(
+    current_user: Annotated[User, Depends(get_current_user)],
+    fmt: Literal["ndjson", "csv"] = Query(
+        "ndjson", alias="format", description="Export format (ndjson/csv)."
+    ),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+):
+    """
+    Stream every patient record visible to the caller as NDJSON or CSV.
+    Rows are read from a Mongo cursor and sent as they arrive, in constant memory.
+    """
+    selected: list[str] | None = parse_fields(fields)
+    cursor = patients_cursor(record_scope(current_user), fields=selected)
+
+    if cursor is None:
+        raise HTTPException(status_code=500, detail="Failed to fetch patient records.")
 
-    if len(data) == 0:
-        return []
+    columns: list[str] = EXPORT_FIELDS
+    if selected is not None:
+        columns = ["pid", *[field for field in selected if field != "pid"]]
 
-    return list(data)
+    return StreamingResponse(
+        export_rows(cursor, fmt, columns),
+        media_type="text/csv" if fmt == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="records.{fmt}"'},
+    )
 
 
 @router.get(
     "/id/{patient_id}",
     dependencies=[Depends(require_permission(Permission.VIEW_PATIENT))],
+    response_model=PatientRecord,
+    response_model_exclude_unset=True,
 )
-def view_patient_by_id(
+async def view_patient_by_id(
     patient_id: str = Path(
-        ..., description="Patient ID in the database.", examples=["P001"]
+        ..., description="Patient ID in the database.", examples=["P0000001"]
     ),
     current_user: Annotated[User, Depends(get_current_user)] = None,
+    response: Response = None,
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
-    data: dict | str | None = get_patient_by_id(patient_id)
+    """
+    Fetch one patient record. Send its ETag in `If-None-Match` to get a
+    bodiless 304 when the record is unchanged.
+    """
+    selected: list[str] | None = parse_fields(fields)
+
+    # NOTE: A version-only read answers conditional GETs without loading the record,
+    # and keys the cached body so a write in another worker is never served stale
+    version: int | None = await get_patient_version(
+        patient_id, record_scope(current_user)
+    )
+    if version is not None and if_none_match is not None:
+        check_not_modified(if_none_match, record_etag(version))
+
+    data: dict | str | None
+    if version is None:
+        # NOTE: Missing / out of scope (or unreadable) : not cached, answered below
+        data = await get_patient_by_id(patient_id)
+    else:
+        data = await record_cache.fetch(
+            "id",
+            {"pid": patient_id},
+            None,
+            CACHE_TTL_RECORD,
+            lambda: get_patient_by_id(patient_id),
+            generation=version,
+        )
 
     if data is None:
         raise HTTPException(status_code=500, detail="Failed to fetch patient record.")
@@ -111,27 +355,43 @@ def view_patient_by_id(
                 detail="You can only access your own patient record.",
             )
 
-    return data
+    response.headers["ETag"] = record_etag(data.get("version"))
+    response.headers["Cache-Control"] = "private, no-cache"
+    return pick(data, selected)
 
 
 @router.get(
-    "/name", dependencies=[Depends(require_permission(Permission.VIEW_PATIENT))]
+    "/name",
+    dependencies=[Depends(require_permission(Permission.VIEW_PATIENT))],
+    response_model=list[PatientRecord],
+    response_model_exclude_unset=True,
 )
-def view_patients_by_name(
+async def view_patients_by_name(
     patient_name: str = Query(
         ..., description="Patient name in the database.", examples=["John Doe"]
     ),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
     current_user: Annotated[User, Depends(get_current_user)] = None,
 ):
-    data: list[dict] | None = get_patients_by_name(patient_name)
+    selected: list[str] | None = parse_fields(fields)
+    scope: dict = record_scope(current_user)
+    # NOTE: Keyed on the change count like the listings, so writes aren't served stale
+    changes: int | None = await get_records_change_count()
+
+    data: list[dict] | None = await record_cache.fetch(
+        "name",
+        {"name": patient_name, "fields": selected},
+        scope,
+        CACHE_TTL_LIST,
+        lambda: get_patients_by_name(patient_name, scope, selected),
+        generation=changes,
+    )
 
     if data is None:
         raise HTTPException(
             status_code=500, detail="Failed to fetch patient record(s)."
         )
 
-    data = filter_records_for_user(data, current_user)
-
     if data == []:
         raise HTTPException(
             status_code=404,
@@ -142,32 +402,55 @@ def view_patients_by_name(
 
 
 @router.get(
-    "/name/search", dependencies=[Depends(require_permission(Permission.VIEW_PATIENT))]
+    "/name/search",
+    dependencies=[Depends(require_permission(Permission.VIEW_PATIENT))],
+    response_model=list[PatientRecord],
+    response_model_exclude_unset=True,
 )
-def search_patients_by_name_fuzzy(
+async def search_patients_by_name_fuzzy(
     patient_name: str = Query(
         ...,
         description="Patient name (partial match with fuzzy search).",
         examples=["John"],
     ),
+    limit: int = Query(
+        NAME_SEARCH_DEFAULT_LIMIT, ge=1, le=MAX_PAGE_SIZE, description="Max. results."
+    ),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
     current_user: Annotated[User, Depends(get_current_user)] = None,
 ):
     """
     Fuzzy search for patients by name.
     Returns partial matches sorted by relevance (exact matches first).
-    Case-insensitive matching.
+    Case-insensitive and typo-tolerant matching.
     """
     if not patient_name or not patient_name.strip():
         raise HTTPException(status_code=400, detail="Patient name cannot be empty.")
 
-    data: list[dict] | None = get_patients_by_name_fuzzy(patient_name)
+    if len(" ".join(patient_name.split())) < NAME_SEARCH_MIN_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Patient name must be at least {NAME_SEARCH_MIN_LENGTH} characters.",
+        )
+
+    selected: list[str] | None = parse_fields(fields)
+    scope: dict = record_scope(current_user)
+    changes: int | None = await get_records_change_count()
+
+    data: list[dict] | None = await record_cache.fetch(
+        "search",
+        {"name": patient_name.strip().lower(), "limit": limit, "fields": selected},
+        scope,
+        CACHE_TTL_SEARCH,
+        lambda: get_patients_by_name_fuzzy(patient_name, scope, limit, selected),
+        generation=changes,
+    )
 
     if data is None:
         raise HTTPException(
             status_code=500, detail="Failed to fetch patient record(s)."
         )
 
-    data = filter_records_for_user(data, current_user)
     return data
 
 
@@ -175,33 +458,122 @@ def search_patients_by_name_fuzzy(
     "/recent-admissions",
     dependencies=[Depends(require_permission(Permission.VIEW_PATIENT))],
 )
-def get_recent_admissions_count(
+async def get_recent_admissions_count(
     current_user: Annotated[User, Depends(get_current_user)],
 ):
     """
     Returns the number of patients admitted in the last 24 hours.
     """
-    data: list[dict] | None = get_recent_admissions()
+    count: int | None = await count_recent_admissions(record_scope(current_user))
 
-    if data is None:
+    if count is None:
         raise HTTPException(
             status_code=500, detail="Failed to fetch recent patient admissions."
         )
 
-    data = filter_records_for_user(data, current_user)
-    return {"count": len(data)}
+    return {"count": count}
+
+
+@router.get(
+    "/stats", dependencies=[Depends(require_permission(Permission.VIEW_PATIENT))]
+)
+async def record_stats(
+    current_user: Annotated[User, Depends(get_current_user)],
+    verdict: str | None = Query(None, description="Only records with this BMI verdict."),
+    city: str | None = Query(None, description="Only records from this city."),
+    gender: Literal["male", "female", "others"] | None = Query(
+        None, description="Only records of this gender."
+    ),
+    min_age: int | None = Query(None, ge=0, description="Minimum age (inclusive)."),
+    max_age: int | None = Query(None, ge=0, description="Maximum age (inclusive)."),
+):
+    """
+    Cohort statistics over the records visible to the caller : counts per verdict,
+    city and gender, age / BMI histograms and average / percentile vitals.
+    Computed inside the database by a single aggregation.
+    """
+    if min_age is not None and max_age is not None and min_age > max_age:
+        raise HTTPException(
+            status_code=400, detail="'min_age' cannot be greater than 'max_age'."
+        )
+
+    scope: dict = record_scope(current_user)
+    match: dict = stats_filter(verdict, city, gender, min_age, max_age)
+    changes: int | None = await get_records_change_count()
+
+    data: dict | None = await record_cache.fetch(
+        "stats",
+        match,
+        scope,
+        CACHE_TTL_STATS,
+        lambda: get_record_stats(match, scope),
+        generation=changes,
+    )
+
+    if data is None:
+        raise HTTPException(
+            status_code=500, detail="Failed to compute record statistics."
+        )
+
+    return data
 
 
 @router.get(
-    "/sort", dependencies=[Depends(require_permission(Permission.VIEW_PATIENT))]
+    "/census", dependencies=[Depends(require_permission(Permission.VIEW_PATIENT))]
 )
-def sort_patients(
+async def daily_census(
+    current_user: Annotated[User, Depends(get_current_user)],
+    start: date = Query(..., alias="from", description="First day (YYYY-MM-DD)."),
+    end: date = Query(..., alias="to", description="Last day (YYYY-MM-DD)."),
+):
+    """
+    Daily admissions, discharges and in-patient counts (overall and per city),
+    read from the census rollup.
+    """
+    if current_user.role == Role.PATIENT:
+        raise HTTPException(
+            status_code=403, detail="The census is not available to patients."
+        )
+
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' cannot be before 'from'.")
+
+    if (end - start).days >= CENSUS_MAX_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date range cannot exceed {CENSUS_MAX_DAYS} days.",
+        )
+
+    days: list[dict] | None = await get_census(start.isoformat(), end.isoformat())
+
+    if days is None:
+        raise HTTPException(status_code=500, detail="Failed to fetch daily census.")
+
+    return {"from": start.isoformat(), "to": end.isoformat(), "days": days}
+
+
+@router.get(
+    "/sort",
+    dependencies=[Depends(require_permission(Permission.VIEW_PATIENT))],
+    response_model=RecordPage,
+    response_model_exclude_unset=True,
+)
+async def sort_patients(
     sort_by: str = Query(
         ...,
         description="Sort records on the basis of height, weight or bmi.",
     ),
     order: str = Query("asc", description="Sort in ascending or descending order."),
+    limit: int = Query(
+        DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size."
+    ),
+    cursor: str | None = Query(
+        None, description="Opaque cursor from the previous page's `next_cursor`."
+    ),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
     current_user: Annotated[User, Depends(get_current_user)] = None,
+    response: Response = None,
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
     if sort_by not in sort_fields:
         raise HTTPException(
@@ -215,16 +587,37 @@ def sort_patients(
             detail="Invalid sorting order. Select either 'asc' or 'desc'.",
         )
 
-    data: list[dict] | None = sort_records_by_param(
-        sort_by, True if order == "desc" else False
+    selected: list[str] | None = parse_fields(fields)
+    position: dict | None = read_cursor(cursor, sort_by, order)
+    after: tuple | None = (position.get("value"), position["pid"]) if position else None
+    scope: dict = record_scope(current_user)
+    changes: int | None = await tag_listing(response, if_none_match)
+
+    data: list[dict] | None = await record_cache.fetch(
+        "sort",
+        {
+            "sort_by": sort_by,
+            "order": order,
+            "limit": limit,
+            "after": after,
+            "fields": selected,
+        },
+        scope,
+        CACHE_TTL_LIST,
+        lambda: sort_records_by_param(
+            sort_by,
+            True if order == "desc" else False,
+            limit + 1,
+            after,
+            scope=scope,
+            fields=selected,
+        ),
+        generation=changes,
     )
 
     if data is None:
         raise HTTPException(status_code=500, detail="Failed to fetch patient records.")
 
-    data = filter_records_for_user(data, current_user)
+    data, next_cursor = paginate(data, limit, sort_by, order)
 
-    if data == []:
-        return {"message": "No patient records found."}
-
-    return data
+    return {"records": data, "next_cursor": next_cursor}
@@ -10,6 +10,8 @@ from pytz import timezone as tz
 
 from fastapi import APIRouter
 
+from services.cache import record_cache
+
 load_dotenv()
 TIMEZONE: str = environ.get("TIMEZONE", "Asia/Kolkata")
 
@@ -32,3 +34,8 @@ def health():
         "status": "All is well. ✈️",
         "time": f"{datetime.now(tz=tz(TIMEZONE)).isoformat()}",
     }
+
+
+@router.get("/health/cache")
+def cache_health():
+    return record_cache.stats()
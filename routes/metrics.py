@@ -0,0 +1,37 @@
+"""
+Metrics route
+
+- Prometheus scrape endpoint, with the in-process stats of the caches, password
+  hasher and activity pipeline exported alongside the request / Mongo metrics.
+"""
+
+from fastapi import APIRouter, HTTPException, Response
+
+from auth.password_manager import hasher_stats
+from auth.principal_cache import principal_cache
+from config.constants import METRICS_ENABLED
+from services import db as database
+from services.cache import record_cache
+from services.metrics import register_stats, render
+
+router = APIRouter(tags=["Health"])
+
+register_stats("record_cache", record_cache.stats)
+register_stats("principal_cache", principal_cache.stats)
+register_stats("password_hasher", hasher_stats)
+register_stats("activity_hub", database.activity_hub.stats)
+
+if database.activity_writer is not None:
+    register_stats("activity_writer", database.activity_writer.stats)
+if database.activity_archiver is not None:
+    register_stats("activity_archiver", database.activity_archiver.stats)
+
+
+# NOTE: `async`, so the threadpool gauges are read on the event loop
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled.")
+
+    body, content_type = render()
+    return Response(content=body, media_type=content_type)
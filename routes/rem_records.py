@@ -6,42 +6,102 @@ Remove records
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, Header, HTTPException
 
 from auth.dependencies import get_current_user, require_permission
+from auth.scope_manager import record_scope
+from config.constants import BULK_MAX_ITEMS
 from models.models import User
 from models.permissions import Permission
-from services.db import delete_patient, get_patient_by_id, log_activity
+from utils.utils import if_match_version, raise_for_write_failure
+from services.db import (
+    delete_patient,
+    delete_patients,
+    log_activities,
+    log_activity,
+)
 
 router = APIRouter(prefix="/discharge", tags=["Discharge_Patients"])
 
 
+# NOTE: Declared before `/{pid}` so "bulk" isn't taken for a PID
+@router.delete(
+    "/bulk", dependencies=[Depends(require_permission(Permission.DISCHARGE_PATIENT))]
+)
+async def bulk_delete_handler(
+    pids: Annotated[list[str], Body(..., embed=True, max_length=BULK_MAX_ITEMS)],
+    current_user: Annotated[User, Depends(get_current_user)],
+):
+    """
+    Discharge many patients in one request (body : `{"pids": [...]}`).
+    Returns a per-PID outcome, in request order.
+    """
+    outcomes: list[dict] | None = await delete_patients(
+        pids, record_scope(current_user)
+    )
+    if outcomes is None:
+        raise HTTPException(
+            status_code=500, detail="Failed to discharge patient records."
+        )
+
+    await log_activities(
+        [
+            {
+                "action_type": "patient_discharged",
+                "patient_id": outcome["pid"],
+                "patient_name": outcome["name"],
+                "description": "Patient record removed from system",
+            }
+            for outcome in outcomes
+            if outcome["status"] == "discharged"
+        ]
+    )
+
+    results: list[dict] = [
+        {"index": index, "pid": outcome["pid"], "status": outcome["status"]}
+        for index, outcome in enumerate(outcomes)
+    ]
+    discharged: int = sum(result["status"] == "discharged" for result in results)
+    return {
+        "discharged": discharged,
+        "failed": len(results) - discharged,
+        "results": results,
+    }
+
+
 @router.delete(
     "/{pid}", dependencies=[Depends(require_permission(Permission.DISCHARGE_PATIENT))]
 )
-def delete_handler(
+async def delete_handler(
     pid: str,
     current_user: Annotated[User, Depends(get_current_user)],
+    if_match: Annotated[str | None, Header()] = None,
 ):
+    """
+    Discharge a patient. Send the record's ETag in `If-Match` to have the
+    discharge rejected (412) if someone else changed the record in the meantime.
+    """
     try:
-        # Get patient info before deletion for logging
-        patient_info = get_patient_by_id(pid)
-        patient_name = "Unknown"
-
-        if patient_info and isinstance(patient_info, dict):
-            patient_name = patient_info.get("name", "Unknown")
+        # NOTE: The deleted document carries the name for logging - no read beforehand
+        deleted: dict | str | None = await delete_patient(
+            pid, record_scope(current_user), if_match_version(if_match)
+        )
+        if isinstance(deleted, str):
+            raise_for_write_failure(deleted, pid, "discharge")
 
-        if delete_patient(pid):
+        if deleted:
             # Log the discharge activity
-            log_activity(
+            await log_activity(
                 action_type="patient_discharged",
                 patient_id=pid,
-                patient_name=patient_name,
+                patient_name=deleted.get("name", "Unknown"),
                 description="Patient record removed from system",
             )
             return {"message": f"Patient [{pid}] has been discharged."}
         raise HTTPException(
-            status_code=404, detail=f"Patient with ID : '{pid}' not found."
+            status_code=500, detail="Failed to discharge patient record."
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error : {e}")
@@ -6,13 +6,27 @@ Update records
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Response
+from pydantic import ValidationError
 
 from auth.dependencies import get_current_user, require_permission
+from auth.scope_manager import record_scope
+from config.constants import BULK_MAX_ITEMS
 from models.models import PatientUpdate, User
 from models.permissions import Permission
-from models.roles import Role
-from services.db import update_patient, log_activity
+from utils.utils import (
+    if_match_version,
+    raise_for_write_failure,
+    record_etag,
+    validation_message,
+)
+from services.db import (
+    link_user_to_patient,
+    log_activities,
+    log_activity,
+    update_patient,
+    update_patients,
+)
 
 router = APIRouter(prefix="/patient", tags=["Patients"])
 
@@ -20,11 +34,19 @@ router = APIRouter(prefix="/patient", tags=["Patients"])
 @router.put(
     "/update", dependencies=[Depends(require_permission(Permission.UPDATE_PATIENT))]
 )
-def update_handler(
+async def update_handler(
     updated_patient_data: dict,
     current_user: Annotated[User, Depends(get_current_user)],
+    response: Response,
+    if_match: Annotated[str | None, Header()] = None,
 ):
+    """
+    Update a patient record. Send the record's ETag in `If-Match` to have the
+    update rejected (412) if someone else changed the record in the meantime.
+    """
     try:
+        expected_version: int | None = if_match_version(if_match)
+
         # Normalize email if present
         if "email" in updated_patient_data and updated_patient_data["email"]:
             updated_patient_data["email"] = (
@@ -38,37 +60,88 @@ def update_handler(
                 status_code=400, detail="Missing 'pid' value in request."
             )
 
-        # NOTE: Patients can only update their own record
-        if current_user.role == Role.PATIENT:
-            from services.db import get_patient_by_id
-
-            existing = get_patient_by_id(temp.pid)
-            if isinstance(existing, dict):
-                existing_email = str(existing.get("email", "")).strip().lower()
-                user_email = (current_user.email or "").strip().lower()
-                if existing_email != user_email:
-                    raise HTTPException(
-                        status_code=403,
-                        detail="You can only update your own patient record.",
-                    )
-
-        updated_record = update_patient(temp.pid, temp)
+        # NOTE: Patients can only update their own record (folded into the write)
+        updated_record: dict | str | None = await update_patient(
+            temp.pid, temp, record_scope(current_user), expected_version
+        )
+        if isinstance(updated_record, str):
+            raise_for_write_failure(updated_record, temp.pid, "update")
+
         if updated_record:
-            log_activity(
+            if temp.email:
+                await link_user_to_patient(temp.email, temp.pid)
+
+            await log_activity(
                 action_type="patient_updated",
                 patient_id=temp.pid,
                 patient_name=updated_record.get("name", "Unknown"),
                 description="Patient information modified",
             )
+            response.headers["ETag"] = record_etag(updated_record.get("version"))
             return {
                 "message": f"Patient record [{temp.pid}] updated.",
                 "updated_record": updated_record,
             }
-        raise HTTPException(
-            status_code=404, detail=f"Patient with ID : '{temp.pid}' not found."
-        )
+        raise HTTPException(status_code=500, detail="Failed to update patient record.")
 
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error : {e}")
+
+
+@router.put(
+    "/update/bulk",
+    dependencies=[Depends(require_permission(Permission.UPDATE_PATIENT))],
+)
+async def bulk_update_handler(
+    updates: Annotated[list[dict], Body(..., max_length=BULK_MAX_ITEMS)],
+    current_user: Annotated[User, Depends(get_current_user)],
+):
+    """
+    Update many patient records in one request (one object with a `pid` per record).
+    Returns a per-item outcome, in request order.
+    """
+    results: list[dict] = [{"index": i} for i in range(len(updates))]
+    valid: list[tuple[dict, PatientUpdate]] = []
+
+    for result, data in zip(results, updates):
+        if "email" in data and data["email"]:
+            data["email"] = str(data["email"]).strip().lower()
+
+        try:
+            temp: PatientUpdate = PatientUpdate(**data)
+        except ValidationError as e:
+            result.update(status="error", error=validation_message(e))
+            continue
+
+        if not temp.pid:
+            result.update(status="error", error="Missing 'pid' value.")
+            continue
+
+        valid.append((result, temp))
+
+    outcomes: list[dict] | None = await update_patients(
+        [temp for _, temp in valid], record_scope(current_user)
+    )
+    if outcomes is None:
+        raise HTTPException(status_code=500, detail="Failed to update patient records.")
+
+    for (result, _), outcome in zip(valid, outcomes):
+        result.update(pid=outcome["pid"], status=outcome["status"])
+
+    await log_activities(
+        [
+            {
+                "action_type": "patient_updated",
+                "patient_id": outcome["pid"],
+                "patient_name": outcome.get("name", "Unknown"),
+                "description": "Patient information modified",
+            }
+            for outcome in outcomes
+            if outcome["status"] == "updated"
+        ]
+    )
+
+    updated: int = sum(result["status"] == "updated" for result in results)
+    return {"updated": updated, "failed": len(results) - updated, "results": results}
@@ -0,0 +1,266 @@
+"""
+Activity archive
+
+- Retention for the activities collection : entries older than the retention
+  window are streamed into gzip-compressed JSONL segments, one per archive
+  batch and local day (`<dir>/<YYYY>/<MM>/<YYYY-MM-DD>/<written_at>.jsonl.gz`),
+  then deleted.
+- Segments are written once (to a temp file, renamed in when synced), so a
+  crash never leaves a partial one, and they can be scanned by date range
+  without rehydrating them into Mongo.
+- A lease in the counters collection keeps one worker archiving at a time.
+  Segments live on local disk : point `ACTIVITY_ARCHIVE_DIR` at shared storage
+  when running on several hosts.
+- Run a single pass by hand with `python -m services.activity_archive`.
+"""
+
+import asyncio
+import gzip
+import os
+import time
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterator
+
+from bson import json_util
+from pytz import timezone as tz
+
+from config.constants import TIMEZONE
+from services.leases import acquire_lease, lease_holder, release_lease
+
+LEASE_ID: str = "activity_archiver"
+
+
+def segment_dir(directory: str, day: date) -> str:
+    return os.path.join(directory, f"{day.year:04d}", f"{day.month:02d}", day.isoformat())
+
+
+def segment_paths(directory: str, day: date) -> list[str]:
+    """A day's segments, in write order."""
+    folder = segment_dir(directory, day)
+    if not os.path.isdir(folder):
+        return []
+    return [
+        os.path.join(folder, name)
+        for name in sorted(os.listdir(folder))
+        if name.endswith(".jsonl.gz")
+    ]
+
+
+def local_day(timestamp: datetime) -> date:
+    """Day of a (UTC) timestamp in `TIMEZONE`, which is how segments are partitioned."""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(tz(TIMEZONE)).date()
+
+
+def write_segments(directory: str, docs: list[dict]) -> None:
+    """Write `docs` as a new segment per day, synced to disk before returning."""
+    by_day: dict[date, list[dict]] = {}
+    for doc in docs:
+        by_day.setdefault(local_day(doc["timestamp"]), []).append(doc)
+
+    for day, entries in by_day.items():
+        folder = segment_dir(directory, day)
+        os.makedirs(folder, exist_ok=True)
+
+        # NOTE: Written aside and renamed in, so readers never see a partial segment
+        path = os.path.join(folder, f"{time.time_ns():020d}-{os.getpid()}.jsonl.gz")
+        with open(f"{path}.tmp", "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as segment:
+                for doc in entries:
+                    segment.write((json_util.dumps(doc) + "\n").encode("utf-8"))
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(f"{path}.tmp", path)
+
+        folder_fd = os.open(folder, os.O_RDONLY)
+        try:
+            os.fsync(folder_fd)
+        finally:
+            os.close(folder_fd)
+
+
+def read_segment(path: str) -> Iterator[dict]:
+    """Entries of one segment, in write order."""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as segment:
+            for line in segment:
+                if line.strip():
+                    yield json_util.loads(line)
+    except (EOFError, gzip.BadGzipFile, zlib.error) as e:
+        print(f"\nWarning: Corrupt activity archive segment '{path}' : {e}\n")
+
+
+def read_day(directory: str, day: date) -> Iterator[dict]:
+    """Entries archived for `day`, in write order, each one once."""
+    seen: set = set()
+    for path in segment_paths(directory, day):
+        for doc in read_segment(path):
+            # NOTE: A batch re-archived after a crash (before its delete) is skipped
+            if doc.get("_id") in seen:
+                continue
+            seen.add(doc.get("_id"))
+            yield doc
+
+
+def scan_segments(
+    directory: str,
+    start: date,
+    end: date,
+    match: dict,
+    limit: int,
+    after: tuple[str, int] | None = None,
+) -> tuple[list[dict], tuple[str, int] | None]:
+    """
+    Archived entries for days `start`..`end` equal to `match` on every key, oldest first.
+    Returns up to `limit` entries and the `(day, position)` to resume after, if any.
+    """
+    rows: list[tuple[str, int, dict]] = []
+    day: date = start
+
+    if after is not None:
+        day = max(day, date.fromisoformat(after[0]))
+
+    while day <= end and len(rows) <= limit:
+        key = day.isoformat()
+        skip: int = after[1] if after is not None and after[0] == key else -1
+
+        for position, doc in enumerate(read_day(directory, day)):
+            if position <= skip:
+                continue
+            if all(doc.get(k) == v for k, v in match.items()):
+                rows.append((key, position, doc))
+                if len(rows) > limit:
+                    break
+
+        day += timedelta(days=1)
+
+    if len(rows) <= limit:
+        return [doc for _, _, doc in rows], None
+
+    last_day, last_position, _ = rows[limit - 1]
+    return [doc for _, _, doc in rows[:limit]], (last_day, last_position)
+
+
+class ActivityArchiver:
+    """Periodically moves activities older than `retention_days` into archive segments."""
+
+    def __init__(
+        self,
+        collection,
+        leases,
+        directory: str,
+        retention_days: float,
+        batch_size: int,
+        interval: float,
+    ):
+        self.collection = collection
+        self.leases = leases
+        self.directory = directory
+        self.retention = timedelta(days=retention_days)
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self.holder: str = lease_holder()
+        self._task: asyncio.Task | None = None
+        self._stats: dict[str, int] = {"runs": 0, "archived": 0, "failed": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self.running or self.interval <= 0:
+            return
+        self._task = asyncio.create_task(self._run(), name="activity-archiver")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> dict[str, int]:
+        return dict(self._stats)
+
+    async def archive(self) -> int:
+        """
+        Archive (and delete) every entry past retention, renewing the lease after
+        each batch. Returns how many moved.
+        """
+        cutoff = datetime.now(tz=timezone.utc) - self.retention
+        moved: int = 0
+
+        while True:
+            docs = (
+                await self.collection.find({"timestamp": {"$lt": cutoff}})
+                .sort([("timestamp", 1), ("_id", 1)])
+                .limit(self.batch_size)
+                .to_list()
+            )
+            if not docs:
+                break
+
+            # NOTE: Deleted only once the segment is on disk (at-least-once)
+            await asyncio.to_thread(write_segments, self.directory, docs)
+            await self.collection.delete_many(
+                {"_id": {"$in": [doc["_id"] for doc in docs]}}
+            )
+            moved += len(docs)
+
+            # NOTE: A long backlog can outlast the lease, so it's renewed per batch
+            if not await self._acquire_lease():
+                print("\nWarning: Activity archive lease lost, stopping this run.\n")
+                break
+
+        self._stats["runs"] += 1
+        self._stats["archived"] += moved
+        return moved
+
+    async def run_once(self, release: bool = False) -> int | None:
+        """
+        Archive under the lease. Returns how many entries moved, or `None` if
+        another worker holds it. `release` hands the lease back afterwards.
+        """
+        if not await self._acquire_lease():
+            return None
+
+        try:
+            return await self.archive()
+        finally:
+            if release:
+                await release_lease(self.leases, LEASE_ID, self.holder)
+
+    async def _acquire_lease(self) -> bool:
+        return await acquire_lease(
+            self.leases, LEASE_ID, self.holder, self.interval * 2
+        )
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self._stats["failed"] += 1
+                print(f"\nError archiving activities : {e}\n")
+
+            await asyncio.sleep(self.interval)
+
+
+if __name__ == "__main__":
+    from services import db as database
+
+    async def main() -> None:
+        moved = await database.archive_activities()
+        if moved is None:
+            print("Not archived : retention is off, or another worker is archiving.")
+        else:
+            print(f"Archived {moved} activit{'y' if moved == 1 else 'ies'}.")
+        await database.close_client()
+
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+"""
+Activity hub
+
+- In-process pub/sub for live activity feeds : `log_activity` publishes each
+  entry once and every subscriber (e.g. an SSE connection) gets it from its own
+  bounded buffer. A subscriber that falls `buffer_size` entries behind is
+  evicted and reconnects with `Last-Event-ID`, instead of slowing the writers.
+- The last `replay_size` entries are kept for resuming, which also covers
+  entries the background writer hasn't flushed to Mongo yet.
+- Per process : subscribers only see entries logged by the worker they are
+  connected to.
+"""
+
+import asyncio
+from collections import deque
+
+
+class Subscription:
+    """One subscriber's buffer. `evicted` is set once it overflows."""
+
+    def __init__(self, buffer_size: int):
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=buffer_size)
+        self.evicted: bool = False
+
+
+class ActivityHub:
+    def __init__(self, buffer_size: int, replay_size: int):
+        self.buffer_size = max(1, buffer_size)
+        self._subscribers: set[Subscription] = set()
+        self._recent: deque[dict] = deque(maxlen=max(0, replay_size))
+        self._stats: dict[str, int] = {"published": 0, "evicted": 0}
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.buffer_size)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def publish(self, doc: dict) -> None:
+        """Fan an entry out to every subscriber (never blocks)."""
+        self._recent.append(doc)
+        self._stats["published"] += 1
+
+        for subscription in list(self._subscribers):
+            try:
+                subscription.queue.put_nowait(doc)
+            except asyncio.QueueFull:
+                subscription.evicted = True
+                self._subscribers.discard(subscription)
+                self._stats["evicted"] += 1
+
+    def replay_after(self, last_id) -> list[dict] | None:
+        """Entries published after `last_id`, or `None` if it is no longer retained."""
+        recent = list(self._recent)
+        for index, doc in enumerate(recent):
+            if doc["_id"] == last_id:
+                return recent[index + 1 :]
+        return None
+
+    def stats(self) -> dict[str, int]:
+        return {**self._stats, "subscribers": len(self._subscribers)}
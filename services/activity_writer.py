@@ -0,0 +1,241 @@
+"""
+Activity writer
+
+- Background writer that takes activity documents off the request path and
+  flushes them with `insert_many` once `batch_size` entries are queued or
+  `flush_interval` seconds have passed, whichever comes first.
+"""
+
+import asyncio
+import os
+import re
+from glob import escape, glob
+from threading import Lock
+
+from bson import json_util
+from pymongo import errors
+
+OVERFLOW_POLICIES: tuple[str, ...] = ("block", "drop", "spill")
+
+
+class ActivityWriter:
+    """
+    Bounded queue of activity documents drained by a single flush task.
+
+    When the queue is full, `overflow` decides what happens to new entries :
+    `block` waits for room, `drop` discards them and `spill` appends them to a
+    per-process `<spill_path>.<pid>` file (re-ingested on the next `start()` of
+    any worker, once that process has exited). Batches that fail to write are
+    spilled too under the `spill` policy, and so are restored entries that fail
+    again, whatever the policy.
+    """
+
+    def __init__(
+        self,
+        collection,
+        max_size: int,
+        batch_size: int,
+        flush_interval: float,
+        overflow: str = "block",
+        spill_path: str = "",
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Invalid overflow policy : '{overflow}'.")
+
+        self.collection = collection
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.spill_path = spill_path
+        self._queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=max_size)
+        self._task: asyncio.Task | None = None
+        self._inflight: asyncio.Future | None = None
+        # NOTE: The batch being gathered, kept here so `stop()` can still write it
+        self._pending: list[dict] = []
+        self._spill_lock = Lock()
+        # NOTE: Per process, so workers sharing `spill_path` never append to one file
+        self._spill_file = f"{spill_path}.{os.getpid()}"
+        self._stats: dict[str, int] = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "dropped": 0,
+            "spilled": 0,
+            "failed": 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+
+        await self._restore_spill()
+        self._task = asyncio.create_task(self._run(), name="activity-writer")
+
+    async def stop(self) -> None:
+        """Stop the flush task and write out everything still queued."""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        if self._inflight is not None:
+            await self._inflight
+
+        batch, self._pending = self._pending, []
+        await self._write(batch)
+
+        while not self._queue.empty():
+            batch = []
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await self._write(batch)
+
+    async def submit(self, doc: dict) -> bool:
+        """Queue a document for writing. Returns `False` if it was dropped."""
+        try:
+            self._queue.put_nowait(doc)
+        except asyncio.QueueFull:
+            if self.overflow == "drop":
+                self._stats["dropped"] += 1
+                return False
+            if self.overflow == "spill":
+                await asyncio.to_thread(self._spill, [doc])
+                return True
+            await self._queue.put(doc)
+
+        self._stats["enqueued"] += 1
+        return True
+
+    def stats(self) -> dict[str, int | bool]:
+        return {
+            **self._stats,
+            "queue_depth": self._queue.qsize(),
+            "max_queue_size": self._queue.maxsize,
+            "running": self.running,
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            self._pending.append(await self._queue.get())
+            deadline = loop.time() + self.flush_interval
+
+            while len(self._pending) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._pending.append(
+                        await asyncio.wait_for(self._queue.get(), timeout)
+                    )
+                except asyncio.TimeoutError:
+                    break
+
+            batch, self._pending = self._pending, []
+            # NOTE: Shielded so a shutdown mid-write doesn't lose the batch
+            self._inflight = asyncio.ensure_future(self._write(batch))
+            await asyncio.shield(self._inflight)
+
+    async def _write(self, batch: list[dict], respill: bool = False) -> None:
+        if not batch:
+            return
+
+        try:
+            result = await self.collection.insert_many(batch, ordered=False)
+            self._stats["written"] += len(result.inserted_ids)
+        except errors.BulkWriteError as e:
+            # NOTE: Duplicate keys come from re-ingesting a spill - already stored
+            failed = [err for err in e.details["writeErrors"] if err["code"] != 11000]
+            self._stats["written"] += e.details["nInserted"]
+            self._stats["failed"] += len(failed)
+            await self._handle_failure(
+                [batch[err["index"]] for err in failed], e, respill
+            )
+        except errors.PyMongoError as e:
+            self._stats["failed"] += len(batch)
+            await self._handle_failure(batch, e, respill)
+
+        self._stats["batches"] += 1
+
+    async def _handle_failure(
+        self, docs: list[dict], exc: Exception, respill: bool = False
+    ) -> None:
+        if not docs:
+            return
+
+        print(f"\nError writing {len(docs)} activity log entries : {exc}\n")
+        if self.overflow == "spill" or respill:
+            await asyncio.to_thread(self._spill, docs)
+
+    def _spill(self, docs: list[dict]) -> None:
+        with self._spill_lock, open(self._spill_file, "a", encoding="utf-8") as f:
+            for doc in docs:
+                f.write(json_util.dumps(doc) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._stats["spilled"] += len(docs)
+
+    def _claim_spills(self) -> list[str]:
+        """
+        Rename the spill files left by processes that are gone (and a legacy
+        `spill_path` file) to names of our own, so only one worker restores each.
+        """
+        claimed: list[str] = []
+        legacy = (self.spill_path, f"{self.spill_path}.restoring")
+        owned = re.compile(
+            rf"{re.escape(self.spill_path)}(?:\.restoring)?\.(\d+)(?:\.\d+)?"
+        )
+
+        for i, path in enumerate(sorted(glob(f"{escape(self.spill_path)}*"))):
+            match = owned.fullmatch(path)
+            if path not in legacy and (match is None or alive(int(match[1]))):
+                continue
+
+            restoring = f"{self.spill_path}.restoring.{os.getpid()}.{i}"
+            try:
+                os.replace(path, restoring)
+            except FileNotFoundError:
+                # NOTE: Claimed by another worker first
+                continue
+            claimed.append(restoring)
+
+        return claimed
+
+    async def _restore_spill(self) -> None:
+        """Write back entries spilled by previous runs, then remove their files."""
+        if not self.spill_path:
+            return
+
+        for restoring in await asyncio.to_thread(self._claim_spills):
+            docs = await asyncio.to_thread(read_spill, restoring)
+
+            for i in range(0, len(docs), self.batch_size):
+                await self._write(docs[i : i + self.batch_size], respill=True)
+
+            await asyncio.to_thread(os.remove, restoring)
+
+
+def alive(pid: int) -> bool:
+    """Whether process `pid` is running (this one counts, it may be spilling)."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_spill(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json_util.loads(line) for line in f if line.strip()]
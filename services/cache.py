@@ -0,0 +1,217 @@
+"""
+Response cache
+
+- Read-through cache for record queries, with an in-process LRU backend and
+  an optional shared Redis backend (`pip install redis`).
+- Writes in `services.db` invalidate it : the record's own entry is dropped and
+  the list generation is bumped, orphaning every cached list/search page.
+"""
+
+import json
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Awaitable, Callable
+
+from config.constants import CACHE_BACKEND, CACHE_MAX_BYTES, CACHE_REDIS_URL
+
+try:
+    from redis import asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+
+class MemoryBackend:
+    """Byte-bounded LRU with per-entry TTLs (per worker)."""
+
+    name: str = "memory"
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size_bytes: int = 0
+        self.evictions: int = 0
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._counters: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if monotonic() >= entry[0]:
+            self._drop(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        size = len(key) + len(value)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+
+        self._drop(key)
+        self._entries[key] = (monotonic() + ttl, value)
+        self.size_bytes += size
+
+        while self.size_bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        self._drop(key)
+
+    async def counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= len(key) + len(entry[1])
+
+
+class RedisBackend:
+    """Shared backend, so every worker sees the same entries and invalidations."""
+
+    name: str = "redis"
+
+    def __init__(self, url: str):
+        self._redis = aioredis.from_url(url)
+        self.evictions: int = 0
+
+    def __len__(self) -> int:
+        return 0
+
+    @property
+    def size_bytes(self) -> int:
+        return 0
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        if ttl > 0:
+            await self._redis.set(key, value, px=int(ttl * 1000))
+
+    async def delete(self, key: str) -> None:
+        await self._redis.delete(key)
+
+    async def counter(self, key: str) -> int:
+        return int(await self._redis.get(key) or 0)
+
+    async def incr(self, key: str) -> int:
+        return await self._redis.incr(key)
+
+
+class RecordCache:
+    """Read-through cache keyed by endpoint, caller scope and query params."""
+
+    def __init__(self, backend: MemoryBackend | RedisBackend | None):
+        self.backend = backend
+        self.hits: int = 0
+        self.misses: int = 0
+
+    async def fetch(
+        self,
+        endpoint: str,
+        params: dict,
+        scope: dict | None,
+        ttl: float,
+        loader: Callable[[], Awaitable[Any]],
+        generation: int | None = None,
+    ) -> Any:
+        """
+        Return the cached result for this query, or run `loader` and cache it (unless `None`).
+        Pass the records change count (or a single record's version) as `generation`
+        to key entries on it instead of the backend's own counter, which other
+        in-memory workers never see bumped.
+        """
+        if self.backend is None:
+            return await loader()
+
+        # NOTE: A failing (shared) backend degrades to uncached reads
+        try:
+            key = await self._key(endpoint, params, scope, generation)
+            cached = await self.backend.get(key)
+        except Exception as e:
+            print(f"\nError reading response cache : {e}\n")
+            return await loader()
+
+        if cached is not None:
+            self.hits += 1
+            return json.loads(cached)
+
+        self.misses += 1
+        value = await loader()
+        if value is not None:
+            try:
+                await self.backend.set(
+                    key, json.dumps(value, default=str).encode(), ttl
+                )
+            except Exception as e:
+                print(f"\nError writing response cache : {e}\n")
+        return value
+
+    async def invalidate(self, *pids: str) -> None:
+        """Drop the entries of records `pids` and every cached list."""
+        if self.backend is None:
+            return
+
+        try:
+            for pid in pids:
+                await self.backend.delete(f"records:id:{pid}")
+            await self.backend.incr("records:generation")
+        except Exception as e:
+            print(f"\nError invalidating response cache : {e}\n")
+
+    def stats(self) -> dict[str, int | float | str]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name if self.backend else "none",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self.backend) if self.backend else 0,
+            "bytes": self.backend.size_bytes if self.backend else 0,
+            "max_bytes": CACHE_MAX_BYTES,
+            "evictions": self.backend.evictions if self.backend else 0,
+        }
+
+    async def _key(
+        self, endpoint: str, params: dict, scope: dict | None, generation: int | None
+    ) -> str:
+        # NOTE: Single records are scope-free (ownership is checked after the read),
+        # and keyed on their version so no worker serves one older than it has seen
+        if endpoint == "id":
+            if generation is not None:
+                return f"records:id:{params['pid']}:v{generation}"
+            return f"records:id:{params['pid']}"
+
+        if generation is not None:
+            tag = f"c{generation}"
+        else:
+            tag = str(await self.backend.counter("records:generation"))
+        scope_key = json.dumps(scope or {}, sort_keys=True)
+        params_key = json.dumps(params, sort_keys=True, default=str)
+        return f"records:{tag}:{endpoint}:{scope_key}:{params_key}"
+
+
+def create_backend(kind: str) -> MemoryBackend | RedisBackend | None:
+    if kind == "none":
+        return None
+
+    if kind == "redis":
+        if aioredis is not None and CACHE_REDIS_URL:
+            return RedisBackend(CACHE_REDIS_URL)
+        print("\nWarning: Redis cache unavailable, falling back to in-memory cache.\n")
+
+    return MemoryBackend(max_bytes=CACHE_MAX_BYTES)
+
+
+record_cache = RecordCache(create_backend(CACHE_BACKEND))
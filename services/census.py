@@ -0,0 +1,207 @@
+"""
+Daily census
+
+- Admissions / discharges per day and per city, kept in a rollup collection by
+  `$inc` upserts from the write paths in `services.db`. Occupancy trends are read
+  from a few hundred small documents instead of a scan of the records.
+- One document per day (`_id` : `YYYY-MM-DD`) plus a running `totals` document,
+  from which the in-patient count before any range is derived.
+- Rebuild (backfill) with `python -m services.census`. Patients already removed
+  from the records collection can't be recovered by a rebuild. A rebuild counts
+  into a staging collection under a lease and renames it over the live one.
+"""
+
+import asyncio
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from typing import Awaitable, Callable
+
+from pymongo import UpdateOne
+
+TOTALS_ID: str = "totals"
+
+# NOTE: Upper bound for day ranges, which keeps `totals` out of them
+LAST_DAY: str = "9999-12-31"
+
+# NOTE: Rebuilds are counted aside and swapped in, one worker at a time
+REBUILD_LEASE_ID: str = "census_rebuild"
+REBUILD_LEASE_SECONDS: float = 900
+STAGING_SUFFIX: str = "_rebuild"
+RECOUNT_ATTEMPTS: int = 3
+
+
+def day_of(value) -> str | None:
+    """Day (`YYYY-MM-DD`) of a stored date / ISO timestamp, `None` if unparseable."""
+    try:
+        return date.fromisoformat(str(value or "")[:10]).isoformat()
+    except ValueError:
+        return None
+
+
+def city_key(city) -> str:
+    """City as a field name (Mongo reads `.` as a path and `$` as an operator)."""
+    key: str = str(city or "").strip().replace(".", "_").replace("$", "_")
+    return key or "unknown"
+
+
+class CensusDelta:
+    """Census `$inc`s for one write (or bulk write), grouped per day."""
+
+    def __init__(self):
+        self.incs: defaultdict[str, Counter] = defaultdict(Counter)
+
+    def record(self, doc: dict, n: int = 1) -> None:
+        """Count a record's admission (and discharge, if set) `n` times (`-1` retracts)."""
+        self._add(doc.get("date_of_admission"), doc.get("city"), "admitted", n)
+        if doc.get("date_of_discharge"):
+            self._add(doc["date_of_discharge"], doc.get("city"), "discharged", n)
+
+    def discharge(self, doc: dict, day: str, n: int = 1) -> None:
+        self._add(day, doc.get("city"), "discharged", n)
+
+    def operations(self) -> list[UpdateOne]:
+        operations: list[UpdateOne] = []
+        for key, counts in self.incs.items():
+            inc: dict = {field: n for field, n in counts.items() if n}
+            if inc:
+                operations.append(UpdateOne({"_id": key}, {"$inc": inc}, upsert=True))
+        return operations
+
+    def _add(self, value, city, field: str, n: int) -> None:
+        day = day_of(value)
+        if day is None:
+            return
+
+        for key in (day, TOTALS_ID):
+            self.incs[key][field] += n
+            self.incs[key][f"cities.{city_key(city)}.{field}"] += n
+
+
+def _counts(doc: dict) -> Counter:
+    """Flatten a census document into `field` / `city.field` counts."""
+    counts: Counter = Counter(
+        admitted=doc.get("admitted", 0), discharged=doc.get("discharged", 0)
+    )
+    for city, values in doc.get("cities", {}).items():
+        for field, n in values.items():
+            counts[f"{city}.{field}"] += n
+    return counts
+
+
+def census_report(totals: dict, days: list[dict], start: str, end: str) -> list[dict]:
+    """
+    Daily rows for `start`..`end` (days without events included), with running
+    in-patient counts. `days` must cover every census day from `start` onwards.
+    """
+    # NOTE: Everything counted before `start` = totals - days from `start` onwards
+    running: Counter = _counts(totals)
+    for doc in days:
+        running.subtract(_counts(doc))
+
+    by_day: dict[str, dict] = {doc["_id"]: doc for doc in days if doc["_id"] <= end}
+    rows: list[dict] = []
+    day: date = date.fromisoformat(start)
+
+    while day.isoformat() <= end:
+        key = day.isoformat()
+        doc = by_day.get(key, {})
+        running.update(_counts(doc))
+
+        cities: dict[str, dict] = {}
+        for name in sorted({k.rsplit(".", 1)[0] for k in running if "." in k}):
+            admitted = doc.get("cities", {}).get(name, {}).get("admitted", 0)
+            discharged = doc.get("cities", {}).get(name, {}).get("discharged", 0)
+            in_patients = running[f"{name}.admitted"] - running[f"{name}.discharged"]
+            if admitted or discharged or in_patients:
+                cities[name] = {
+                    "admitted": admitted,
+                    "discharged": discharged,
+                    "in_patients": in_patients,
+                }
+
+        rows.append(
+            {
+                "date": key,
+                "admitted": doc.get("admitted", 0),
+                "discharged": doc.get("discharged", 0),
+                "in_patients": running["admitted"] - running["discharged"],
+                "cities": cities,
+            }
+        )
+        day += timedelta(days=1)
+
+    return rows
+
+
+async def read_census(census, start: str, end: str) -> list[dict]:
+    """Daily census for `start`..`end` (inclusive, `YYYY-MM-DD`)."""
+    totals: dict = await census.find_one({"_id": TOTALS_ID}) or {}
+    days: list[dict] = (
+        await census.find({"_id": {"$gte": start, "$lte": LAST_DAY}})
+        .sort("_id", 1)
+        .to_list()
+    )
+    return census_report(totals, days, start, end)
+
+
+async def _count_into(records, target, batch_size: int) -> int:
+    delta = CensusDelta()
+    async for doc in records.find(
+        {},
+        {"_id": 0, "city": 1, "date_of_admission": 1, "date_of_discharge": 1},
+        batch_size=batch_size,
+    ):
+        delta.record(doc)
+
+    operations: list[UpdateOne] = delta.operations()
+    for start in range(0, len(operations), batch_size):
+        await target.bulk_write(operations[start : start + batch_size], ordered=False)
+
+    return len(operations)
+
+
+async def recount_census(
+    records,
+    census,
+    batch_size: int,
+    change_count: Callable[[], Awaitable[int | None]],
+) -> int | None:
+    """
+    Recount the census from the records collection into a staging collection,
+    then rename it over the live one. Returns the documents written, or `None`
+    if the records kept changing (per `change_count`) during every attempt.
+    """
+    staging = census.database[f"{census.name}{STAGING_SUFFIX}"]
+
+    for _ in range(RECOUNT_ATTEMPTS):
+        await staging.drop()
+        before = await change_count()
+        written: int = await _count_into(records, staging, batch_size)
+
+        # NOTE: A write during the scan may be missed by it and lost with the old
+        # collection's `$inc`s, so the swap only happens over a quiet scan
+        if await change_count() != before:
+            continue
+
+        if written:
+            await staging.rename(census.name, dropTarget=True)
+        else:
+            await census.delete_many({})
+        return written
+
+    await staging.drop()
+    return None
+
+
+if __name__ == "__main__":
+    from services import db as database
+
+    async def main() -> None:
+        written = await database.rebuild_census()
+        if written is None:
+            print("Not rebuilt : another worker is rebuilding, or records kept changing.")
+        else:
+            print(f"Census rebuilt : {written} document(s).")
+        await database.close_client()
+
+    asyncio.run(main())
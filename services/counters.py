@@ -0,0 +1,49 @@
+"""
+Counters
+
+- In-process rolling counters, kept current by the write paths in `services.db`
+  and periodically reconciled against the database.
+"""
+
+from bisect import bisect_left, insort
+from time import monotonic
+
+
+class RollingCounter:
+    """
+    Counts events inside a sliding window from a sorted list of their ISO timestamps.
+
+    Writes made by other workers are only picked up on the next reconciliation,
+    so `reconcile_every` bounds how stale a count can get.
+    """
+
+    def __init__(self, reconcile_every: float):
+        self.reconcile_every = reconcile_every
+        self._events: list[str] = []
+        self._reconciled_at: float | None = None
+
+    @property
+    def stale(self) -> bool:
+        return (
+            self._reconciled_at is None
+            or monotonic() - self._reconciled_at >= self.reconcile_every
+        )
+
+    def reconcile(self, timestamps: list[str]) -> None:
+        """Replace the tracked events with the authoritative set from the database."""
+        self._events = sorted(timestamps)
+        self._reconciled_at = monotonic()
+
+    def add(self, timestamp: str) -> None:
+        if not self.stale:
+            insort(self._events, timestamp)
+
+    def remove(self, timestamp: str) -> None:
+        idx = bisect_left(self._events, timestamp)
+        if idx < len(self._events) and self._events[idx] == timestamp:
+            self._events.pop(idx)
+
+    def count(self, since: str) -> int:
+        """Number of events at or after `since`, dropping the ones that left the window."""
+        del self._events[: bisect_left(self._events, since)]
+        return len(self._events)
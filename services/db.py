@@ -1,25 +1,82 @@
 """
 DB integration
+
+- Async repository layer built on PyMongo's `AsyncMongoClient`.
+- Blocking wrappers for scripts live in `services.db_sync`.
 """
 
-from pymongo import MongoClient, errors
+import asyncio
+import re
+
+from bson import ObjectId
+from pymongo import (
+    AsyncMongoClient,
+    ReturnDocument,
+    UpdateOne,
+    WriteConcern,
+    errors,
+)
+from pymongo.asynchronous.cursor import AsyncCursor
 from pytz import timezone as tz
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 
-from auth.password_manager import hash_password
+from auth.password_manager import hash_password_async
+from auth.principal_cache import principal_cache
 from models.models import Patient, PatientUpdate, User
 from models.roles import Role
+from services.activity_archive import ActivityArchiver, scan_segments
+from services.activity_hub import ActivityHub
+from services.activity_writer import ActivityWriter
+from services.cache import record_cache
+from services.census import (
+    REBUILD_LEASE_ID,
+    REBUILD_LEASE_SECONDS,
+    CensusDelta,
+    read_census,
+    recount_census,
+)
+from services.counters import RollingCounter
+from services.leases import acquire_lease, lease_holder, release_lease
+from services.metrics import MongoCommandMetrics
+from services.name_index import TrigramIndex, rank, similarity, trigrams
 from config.constants import (
     DB,
+    METRICS_ENABLED,
     MONGO_URI,
     SERVER_SELECTION_TIMEOUT,
+    EXPORT_BATCH_SIZE,
+    BULK_CHUNK_SIZE,
+    RECENT_ADMISSIONS_RECONCILE_SECONDS,
+    NAME_SEARCH_DEFAULT_LIMIT,
+    NAME_SEARCH_MIN_SIMILARITY,
+    NAME_INDEX_REFRESH_SECONDS,
+    NAME_SEARCH_MAX_CANDIDATES,
+    NAME_SEARCH_MIN_LENGTH,
+    ACTIVITY_QUEUE_MAX_SIZE,
+    ACTIVITY_BATCH_SIZE,
+    ACTIVITY_FLUSH_INTERVAL_SECONDS,
+    ACTIVITY_OVERFLOW_POLICY,
+    ACTIVITY_SPILL_PATH,
+    ACTIVITY_WRITE_CONCERN_W,
+    ACTIVITY_RETENTION_DAYS,
+    ACTIVITY_ARCHIVE_DIR,
+    ACTIVITY_ARCHIVE_BATCH_SIZE,
+    ACTIVITY_ARCHIVE_INTERVAL_SECONDS,
+    ACTIVITY_STREAM_BUFFER_SIZE,
+    ACTIVITY_STREAM_REPLAY_SIZE,
     USERS_COLLECTION,
     RECORDS_COLLECTION,
     ACTIVITES_COLLECTION,
+    COUNTERS_COLLECTION,
+    CENSUS_COLLECTION,
     TIMEZONE,
 )
 
 client, db, records_collection, users_collection = None, None, None, None
+counters_collection, census_collection = None, None
+
+# NOTE: Mongo command latencies / errors, exported at `/metrics`
+mongo_metrics = MongoCommandMetrics()
 
 
 # NOTE: Check for missing env. vars.
@@ -44,12 +101,16 @@ if missing_vars:
     records_collection = None
 else:
     try:
-        client = MongoClient(
-            MONGO_URI, serverSelectionTimeoutMS=SERVER_SELECTION_TIMEOUT
+        client = AsyncMongoClient(
+            MONGO_URI,
+            serverSelectionTimeoutMS=SERVER_SELECTION_TIMEOUT,
+            event_listeners=[mongo_metrics] if METRICS_ENABLED else [],
         )
         db = client[DB]
         records_collection = db[RECORDS_COLLECTION]
         users_collection = db[USERS_COLLECTION]
+        counters_collection = db[COUNTERS_COLLECTION]
+        census_collection = db[CENSUS_COLLECTION]
     except errors.PyMongoError as e:
         print(f"\nError : {e}\n")
         client = None
@@ -57,13 +118,30 @@ else:
         records_collection = None
 
 
+# NOTE: Admissions within the last 24 hours
+recent_admissions = RollingCounter(reconcile_every=RECENT_ADMISSIONS_RECONCILE_SECONDS)
+
+
+# NOTE: Typo-tolerant name search (see `build_name_index`)
+name_index = TrigramIndex(
+    min_similarity=NAME_SEARCH_MIN_SIMILARITY, max_candidates=NAME_SEARCH_MAX_CANDIDATES
+)
+name_index_refresher: asyncio.Task | None = None
+
+
+async def close_client() -> None:
+    """Close the shared Mongo client (called on application shutdown)."""
+    if client is not None:
+        await client.close()
+
+
 # NOTE: Auth helpers
 
 
-def get_user_by_username(username: str) -> User | None:
+async def get_user_by_username(username: str) -> User | None:
     """Fetch a user by username from the configured users collection."""
     if users_collection is not None:
-        result = users_collection.find_one({"username": username}, {"_id": 0})
+        result = await users_collection.find_one({"username": username}, {"_id": 0})
         if result is None:
             return None
         return User(**result)
@@ -71,7 +149,7 @@ def get_user_by_username(username: str) -> User | None:
     return None
 
 
-def get_user_by_email(email: str) -> User | None:
+async def get_user_by_email(email: str) -> User | None:
     """
     Fetch a user by email (case-insensitive, trimmed).
     """
@@ -79,26 +157,27 @@ def get_user_by_email(email: str) -> User | None:
         return None
     if not email:
         return None
+    # NOTE: Emails are stored normalized, so an exact match can use the index.
     normalized = email.strip().lower()
-    result = users_collection.find_one(
-        {"email": {"$regex": f"^{normalized}$", "$options": "i"}}, {"_id": 0}
-    )
+    result = await users_collection.find_one({"email": normalized}, {"_id": 0})
     if result is None:
         return None
     return User(**result)
 
 
-def create_user(user_data: dict) -> dict | None:
+async def create_user(user_data: dict) -> dict | None:
     """Create a new user document in the configured users collection."""
     if users_collection is None:
         return None
 
+    # NOTE: Hashing stays outside the try so `PasswordHasherBusy` reaches the caller
+    payload = dict(user_data)
+    payload["password_hash"] = await hash_password_async(payload["password_hash"])
+
     try:
-        payload = dict(user_data)
         payload.setdefault("is_active", True)
         payload.setdefault("role", Role.PATIENT.value)
-        payload["password_hash"] = hash_password(payload["password_hash"])
-        result = users_collection.insert_one(payload)
+        result = await users_collection.insert_one(payload)
         if not result.inserted_id:
             return None
         payload["id"] = str(result.inserted_id)
@@ -108,7 +187,7 @@ def create_user(user_data: dict) -> dict | None:
         return None
 
 
-def user_exists(username: str, email: str | None = None) -> bool:
+async def user_exists(username: str, email: str | None = None) -> bool:
     """Check whether a username or email already exists in the users collection."""
     if users_collection is None:
         return False
@@ -117,50 +196,354 @@ def user_exists(username: str, email: str | None = None) -> bool:
     if email is not None:
         query["$or"].append({"email": email})
 
-    return users_collection.find_one(query) is not None
+    return await users_collection.find_one(query) is not None
+
+
+async def link_user_to_patient(email: str | None, pid: str) -> bool:
+    """
+    Link the user registered with `email` (if any) to the patient record `pid`.
+    A failure is only logged : the record itself is already written by then.
+    """
+    if users_collection is None or not email:
+        return False
+
+    try:
+        result = await users_collection.find_one_and_update(
+            {"email": email.strip().lower()},
+            {"$set": {"pid": pid}},
+            {"_id": 0, "id": 1},
+        )
+    except errors.PyMongoError as e:
+        print(f"\nError linking user to patient record [PID : {pid}] : {e}\n")
+        return False
+
+    if result is None:
+        return False
+
+    principal_cache.invalidate(result["id"])
+    return True
+
+
+async def update_user(username: str, changes: dict) -> User | None:
+    """
+    Update a user's `role` / `is_active` / other fields by username.
+    Drops the cached principal so the change applies on the next request.
+    """
+    if users_collection is None:
+        return None
+
+    changes = dict(changes)
+    if "role" in changes:
+        changes["role"] = Role(changes["role"]).value
+
+    result = await users_collection.find_one_and_update(
+        {"username": username},
+        {"$set": changes},
+        {"_id": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    if result is None:
+        return None
+
+    principal_cache.invalidate(result["id"])
+    return User(**result)
+
+
+async def set_user_active(username: str, is_active: bool) -> User | None:
+    """(De)activate a user account."""
+    return await update_user(username, {"is_active": is_active})
+
+
+async def set_user_role(username: str, role: Role | str) -> User | None:
+    """Change a user's role."""
+    return await update_user(username, {"role": role})
+
+
+async def link_users_to_patients(links: dict[str, str]) -> int:
+    """Link registered users to patient records in one round trip (`email -> pid`)."""
+    if users_collection is None or not links:
+        return 0
+
+    result = await users_collection.bulk_write(
+        [
+            UpdateOne({"email": email}, {"$set": {"pid": pid}})
+            for email, pid in links.items()
+        ],
+        ordered=False,
+    )
+
+    # NOTE: Affected subjects are unknown here, so drop every cached principal
+    if result.modified_count:
+        principal_cache.clear()
+    return result.modified_count
+
+
+async def get_patient_pid_by_email(email: str | None) -> str | None:
+    """Fetch the PID of the first patient record carrying `email` (if any)."""
+    if records_collection is None or not email:
+        return None
+
+    result = await records_collection.find_one(
+        {"email": email.strip().lower()}, {"_id": 0, "pid": 1}, sort=[("pid", 1)]
+    )
+    return result["pid"] if result else None
 
 
 # NOTE: CRUD operation handlers
 
+# NOTE: Reasons a conditional write on a single record can fail
+NOT_FOUND: str = "not_found"
+FORBIDDEN: str = "forbidden"
+VERSION_MISMATCH: str = "version_mismatch"
+
+
+def scoped(query: dict, scope: dict | None) -> dict:
+    """Merge a caller's record scope (see `auth.scope_manager`) into a query."""
+    if not scope:
+        return query
+    if not query:
+        return dict(scope)
+    return {"$and": [query, scope]}
+
+
+def projection(fields: list[str] | None, *required: str) -> dict:
+    """
+    Mongo projection for a sparse fieldset (`None` returns whole records).
+    `required` fields (e.g. the keyset ones) are always included.
+    """
+    if fields is None:
+        return {"_id": 0}
+
+    return {"_id": 0, **{field: 1 for field in [*required, *fields]}}
+
+
+# NOTE: Collection-wide change counter (backs list ETags and cache generations)
+RECORDS_CHANGES_ID: str = "records_changes"
+
+
+async def get_records_change_count() -> int | None:
+    """Number of writes the records collection has seen, or `None` if unavailable."""
+    if counters_collection is None:
+        return None
+
+    try:
+        doc = await counters_collection.find_one({"_id": RECORDS_CHANGES_ID})
+        return doc["seq"] if doc else 0
+    except errors.PyMongoError as e:
+        print(f"\nError reading records change counter : {e}\n")
+        return None
+
+
+async def records_changed(*pids: str) -> None:
+    """Bump the change counter and drop cached copies of `pids` after a write."""
+    if counters_collection is not None:
+        try:
+            await counters_collection.update_one(
+                {"_id": RECORDS_CHANGES_ID}, {"$inc": {"seq": 1}}, upsert=True
+            )
+        except errors.PyMongoError as e:
+            print(f"\nError bumping records change counter : {e}\n")
+
+    await record_cache.invalidate(*pids)
+
+
+# NOTE: Daily census rollup (see `services.census`)
+def today() -> str:
+    return datetime.now(tz=tz(TIMEZONE)).date().isoformat()
+
+
+async def apply_census(delta: CensusDelta) -> None:
+    """Apply a write's census `$inc`s in one round trip (best effort, like the counters)."""
+    operations = delta.operations()
+    if census_collection is None or not operations:
+        return
+
+    try:
+        await census_collection.bulk_write(operations, ordered=False)
+    except errors.PyMongoError as e:
+        print(f"\nError updating daily census : {e}\n")
+
+
+async def get_census(start: str, end: str) -> list[dict] | None:
+    """Daily admissions, discharges and in-patient counts for `start`..`end`."""
+    if census_collection is None:
+        return None
+
+    try:
+        return await read_census(census_collection, start, end)
+    except errors.PyMongoError as e:
+        print(f"\nError reading daily census : {e}\n")
+        return None
+
+
+async def rebuild_census() -> int | None:
+    """
+    Recount the daily census from the records collection (backfill). Returns the
+    documents written, or `None` if another worker is rebuilding it or it failed.
+    """
+    collections = (records_collection, census_collection, counters_collection)
+    if any(collection is None for collection in collections):
+        return None
+
+    holder: str = lease_holder()
+    if not await acquire_lease(
+        counters_collection, REBUILD_LEASE_ID, holder, REBUILD_LEASE_SECONDS
+    ):
+        return None
+
+    try:
+        written = await recount_census(
+            records_collection,
+            census_collection,
+            BULK_CHUNK_SIZE,
+            get_records_change_count,
+        )
+        if written is None:
+            print("\nWarning: Records kept changing, daily census not rebuilt.\n")
+        return written
+    except errors.PyMongoError as e:
+        print(f"\nError rebuilding daily census : {e}\n")
+        return None
+    finally:
+        await release_lease(counters_collection, REBUILD_LEASE_ID, holder)
+
 
 # NOTE: CREATE operation
-def add_patient(p_data: Patient) -> dict | None:
+def patient_document(p_data: Patient) -> dict:
+    """Storage form of a validated patient record."""
+    temp: dict = p_data.model_dump().copy()
+
+    if "date_of_admission" in temp.keys() and temp["date_of_admission"]:
+        temp["date_of_admission"] = str(temp["date_of_admission"])
+
+    if "date_of_discharge" in temp.keys() and temp["date_of_discharge"]:
+        temp["date_of_discharge"] = str(temp["date_of_discharge"])
+
+    # NOTE: Bumped on every write, for optimistic concurrency (`If-Match`)
+    temp["version"] = 1
+    return temp
+
+
+async def add_patient(p_data: Patient) -> dict | None:
     """Creating a new patient record."""
     if records_collection is None:
         return None
 
     try:
-        temp: dict = p_data.model_dump().copy()
+        temp: dict = patient_document(p_data)
 
-        if "date_of_admission" in temp.keys() and temp["date_of_admission"]:
-            temp["date_of_admission"] = str(temp["date_of_admission"])
+        result = await records_collection.insert_one(temp)
+        if not result.inserted_id:
+            return None
 
-        if "date_of_discharge" in temp.keys() and temp["date_of_discharge"]:
-            temp["date_of_discharge"] = str(temp["date_of_discharge"])
+        recent_admissions.add(temp["date_of_admission"])
+        name_index.add(temp["pid"], temp["name"])
+        await records_changed()
 
-        result = records_collection.insert_one(temp)
-        return temp if result.inserted_id else None
+        census = CensusDelta()
+        census.record(temp)
+        await apply_census(census)
+        return temp
 
     except Exception as e:
         print(f"\nError adding patient record : {e}\n")
         return None
 
 
+async def add_patients(
+    patients: list[Patient], chunk_size: int = BULK_CHUNK_SIZE
+) -> list[str | None] | None:
+    """
+    Creating patient records in bulk, with unordered `insert_many` per chunk.
+    Returns one entry per patient : `None` if it was inserted, else the error message.
+    """
+    if records_collection is None:
+        return None
+
+    docs: list[dict] = [patient_document(p) for p in patients]
+    failures: list[str | None] = [None] * len(docs)
+
+    for start in range(0, len(docs), chunk_size):
+        chunk = docs[start : start + chunk_size]
+        try:
+            await records_collection.insert_many(chunk, ordered=False)
+        except errors.BulkWriteError as e:
+            for err in e.details["writeErrors"]:
+                failures[start + err["index"]] = err["errmsg"]
+        except errors.PyMongoError as e:
+            print(f"\nError adding patient records : {e}\n")
+            for i in range(start, start + len(chunk)):
+                failures[i] = str(e)
+
+    inserted: list[dict] = [doc for doc, err in zip(docs, failures) if err is None]
+    census = CensusDelta()
+    for doc in inserted:
+        recent_admissions.add(doc["date_of_admission"])
+        name_index.add(doc["pid"], doc["name"])
+        census.record(doc)
+
+    if inserted:
+        await records_changed()
+        await apply_census(census)
+
+    try:
+        await link_users_to_patients(
+            {doc["email"]: doc["pid"] for doc in inserted if doc.get("email")}
+        )
+    except errors.PyMongoError as e:
+        print(f"\nError linking users to patient records : {e}\n")
+
+    return failures
+
+
 # NOTE: READ operations
-def get_all_patients() -> list[dict] | None:
-    """Retrieves all the patient records."""
+async def get_all_patients(
+    limit: int | None = None,
+    after_pid: str | None = None,
+    scope: dict | None = None,
+    fields: list[str] | None = None,
+) -> list[dict] | None:
+    """
+    Retrieves patient records ordered by PID.
+    With `limit`, returns one page starting after `after_pid` (keyset pagination).
+    """
     if records_collection is None:
         return None
 
-    return list(records_collection.find({}, {"_id": 0}))
+    query: dict = {} if after_pid is None else {"pid": {"$gt": after_pid}}
+    cursor = records_collection.find(
+        scoped(query, scope), projection(fields, "pid")
+    ).sort("pid", 1)
+
+    if limit is not None:
+        cursor = cursor.limit(limit)
+
+    return await cursor.to_list()
 
 
-def get_patient_by_id(pid: str) -> dict | str | None:
-    """Retrieves the patient record with the matching ID."""
+def patients_cursor(
+    scope: dict | None = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    fields: list[str] | None = None,
+) -> AsyncCursor | None:
+    """
+    Returns a lazy cursor over the matching patient records, ordered by PID.
+    Documents are pulled from the server `batch_size` at a time while iterating.
+    """
     if records_collection is None:
         return None
 
-    result = records_collection.find_one({"pid": pid}, {"_id": 0})
+    return records_collection.find(
+        scoped({}, scope), projection(fields, "pid"), batch_size=batch_size
+    ).sort("pid", 1)
+
+
+async def get_patient_by_id(pid: str, scope: dict | None = None) -> dict | str | None:
+    """Retrieves the patient record with the matching ID, within the caller's scope."""
+    if records_collection is None:
+        return None
+
+    result = await records_collection.find_one(scoped({"pid": pid}, scope), {"_id": 0})
 
     if result is None:
         return f"Patient with PID '{pid}' does not exist."
@@ -168,55 +551,162 @@ def get_patient_by_id(pid: str) -> dict | str | None:
     return result
 
 
-def get_patients_by_name(name: str) -> list[dict] | None:
+async def get_patient_version(pid: str, scope: dict | None = None) -> int | None:
+    """
+    Version of a record visible to the caller, read without the rest of the document.
+    Returns `None` if it is missing, out of scope or unreadable.
+    """
+    if records_collection is None:
+        return None
+
+    try:
+        result = await records_collection.find_one(
+            scoped({"pid": pid}, scope), {"_id": 0, "version": 1}
+        )
+    except errors.PyMongoError as e:
+        print(f"\nError reading patient record version [PID : {pid}] : {e}\n")
+        return None
+
+    return result.get("version", 0) if result else None
+
+
+async def get_patients_by_name(
+    name: str, scope: dict | None = None, fields: list[str] | None = None
+) -> list[dict] | None:
     """Retrieves the patient record(s) with the matching name."""
     if records_collection is None:
         return None
 
-    return list(records_collection.find({"name": name}, {"_id": 0}))
+    return await records_collection.find(
+        scoped({"name": name}, scope), projection(fields, "pid")
+    ).to_list()
 
 
-def get_patients_by_name_fuzzy(name: str) -> list[dict] | None:
+async def get_patients_by_name_fuzzy(
+    name: str,
+    scope: dict | None = None,
+    limit: int = NAME_SEARCH_DEFAULT_LIMIT,
+    fields: list[str] | None = None,
+) -> list[dict] | None:
     """Retrieves patient records with fuzzy name matching.
     Returns results sorted by relevance (exact matches first, then partial matches).
+    Tolerates typos by ranking on trigram similarity and edit distance.
     """
     if records_collection is None:
         return None
 
-    if not name.strip():
+    # NOTE: Shorter queries match most names, and would scan them all
+    if len(" ".join(name.split())) < NAME_SEARCH_MIN_LENGTH:
         return []
 
-    # NOTE: Create a case-insensitive regex pattern for partial matching
-    pattern = f".*{name}.*"
+    if name_index.ready and not scope:
+        pids: list[str] = await asyncio.to_thread(name_index.search, name, limit)
+        results = await records_collection.find(
+            {"pid": {"$in": pids}}, projection(fields, "pid")
+        ).to_list()
+        order: dict[str, int] = {pid: i for i, pid in enumerate(pids)}
+        results.sort(key=lambda x: order[x["pid"]])
+        return results
 
-    results = list(
-        records_collection.find(
-            {"name": {"$regex": pattern, "$options": "i"}}, {"_id": 0}
-        )
-    )
+    # NOTE: Scoped callers (and workers without an index yet) rank their own
+    # candidates : a single indexed lookup for patients, a regex scan otherwise
+    query: dict = {} if scope else {"name": {"$regex": re.escape(name), "$options": "i"}}
+    candidates = await records_collection.find(
+        scoped(query, scope), projection(fields, "pid", "name")
+    ).to_list()
+
+    needle: set[str] = trigrams(name)
+    by_pid: dict[str, dict] = {doc["pid"]: doc for doc in candidates}
+    names: dict[str, str] = {pid: doc["name"] for pid, doc in by_pid.items()}
+    scores: dict[str, float] = {
+        pid: similarity(needle, trigrams(doc_name)) for pid, doc_name in names.items()
+    }
+    matches = {
+        pid: score
+        for pid, score in scores.items()
+        if score >= NAME_SEARCH_MIN_SIMILARITY or name.lower() in names[pid].lower()
+    }
+
+    return [by_pid[pid] for pid in rank(name, names, matches)[:limit]]
+
+
+async def build_name_index() -> None:
+    """(Re)build the name index from a `pid`/`name` projection of every record."""
+    if records_collection is None:
+        return
 
-    # NOTE: Sort results by relevance (exact match first, then by length of name)
-    results.sort(
-        key=lambda x: (
-            not x["name"].lower() == name.lower(),  # Exact matches first
-            len(x["name"]),  # Then shorter names (more likely exact matches)
-        )
-    )
+    fresh = TrigramIndex()
+    async for doc in records_collection.find(
+        {}, {"_id": 0, "pid": 1, "name": 1}, batch_size=EXPORT_BATCH_SIZE
+    ):
+        if doc.get("name"):
+            fresh.add(doc["pid"], doc["name"])
+
+    name_index.replace(fresh)
 
-    return results
 
+async def _refresh_name_index() -> None:
+    while True:
+        await asyncio.sleep(NAME_INDEX_REFRESH_SECONDS)
+        try:
+            await build_name_index()
+        except Exception as e:
+            print(f"\nError rebuilding name index: {e}\n")
 
-def sort_records_by_param(sort_by: str, reverse: bool) -> list[dict] | None:
-    """Retrieves patient records sorted by given parameter value in specified order."""
+
+async def start_name_index() -> None:
+    """Build the name index, then rebuild it every `NAME_INDEX_REFRESH_SECONDS` (if set)."""
+    global name_index_refresher
+
+    try:
+        await build_name_index()
+    except Exception as e:
+        print(f"\nError building name index: {e}\n")
+
+    if records_collection is not None and NAME_INDEX_REFRESH_SECONDS > 0:
+        name_index_refresher = asyncio.create_task(_refresh_name_index())
+
+
+async def stop_name_index() -> None:
+    if name_index_refresher is not None:
+        name_index_refresher.cancel()
+
+
+async def sort_records_by_param(
+    sort_by: str,
+    reverse: bool,
+    limit: int | None = None,
+    after: tuple[float, str] | None = None,
+    scope: dict | None = None,
+    fields: list[str] | None = None,
+) -> list[dict] | None:
+    """
+    Retrieves patient records sorted by given parameter value in specified order.
+    With `limit`, returns one page starting after the `(value, pid)` position in `after`.
+    """
     if records_collection is None:
         return None
 
-    return list(
-        records_collection.find({}, {"_id": 0}).sort([(sort_by, -1 if reverse else 1)])
-    )
+    direction: int = -1 if reverse else 1
+    query: dict = {}
+
+    # NOTE: Keyset on (sort_by, pid), served by the `<sort_by>_pid` index
+    if after is not None:
+        value, pid = after
+        op: str = "$lt" if reverse else "$gt"
+        query = {"$or": [{sort_by: {op: value}}, {sort_by: value, "pid": {op: pid}}]}
+
+    cursor = records_collection.find(
+        scoped(query, scope), projection(fields, "pid", sort_by)
+    ).sort([(sort_by, direction), ("pid", direction)])
 
+    if limit is not None:
+        cursor = cursor.limit(limit)
 
-def get_recent_admissions() -> list[dict] | None:
+    return await cursor.to_list()
+
+
+async def get_recent_admissions(scope: dict | None = None) -> list[dict] | None:
     """Retrieves patient records admitted within the last 24 hours."""
     if records_collection is None:
         return None
@@ -225,107 +715,591 @@ def get_recent_admissions() -> list[dict] | None:
         ts_prev_day = datetime.now(tz=tz(TIMEZONE)) - timedelta(days=1)
 
         # NOTE: Query for records where date_of_admission is greater than or equal to 24 hours ago
-        results = list(
-            records_collection.find(
-                {"date_of_admission": {"$gte": ts_prev_day.isoformat()}},
-                {"_id": 0},
-            )
-        )
+        results = await records_collection.find(
+            scoped({"date_of_admission": {"$gte": ts_prev_day.isoformat()}}, scope),
+            {"_id": 0},
+        ).to_list()
         return results
     except Exception as e:
         print(f"\nError fetching recent admissions: {e}\n")
         return None
 
 
-# NOTE: UPDATE operations
-def update_patient(pid: str, updates: PatientUpdate) -> dict | None:
-    """Update a patient record by PID."""
+async def count_recent_admissions(scope: dict | None = None) -> int | None:
+    """
+    Counts patient records admitted within the last 24 hours.
+    Unscoped counts are served from the in-process rolling counter, which is
+    reconciled with an index-covered query once it goes stale.
+    """
     if records_collection is None:
         return None
 
     try:
-        update_dict = updates.model_dump(exclude_unset=True)
+        since: str = (datetime.now(tz=tz(TIMEZONE)) - timedelta(days=1)).isoformat()
+        query: dict = {"date_of_admission": {"$gte": since}}
+
+        if scope:
+            return await records_collection.count_documents(scoped(query, scope))
 
-        if "date_of_admission" in update_dict and update_dict["date_of_admission"]:
-            update_dict["date_of_admission"] = str(update_dict["date_of_admission"])
+        if recent_admissions.stale:
+            docs = await records_collection.find(
+                query, {"_id": 0, "date_of_admission": 1}
+            ).to_list()
+            recent_admissions.reconcile([doc["date_of_admission"] for doc in docs])
 
-        if "date_of_discharge" in update_dict and update_dict["date_of_discharge"]:
-            update_dict["date_of_discharge"] = str(update_dict["date_of_discharge"])
+        return recent_admissions.count(since)
+    except Exception as e:
+        print(f"\nError counting recent admissions: {e}\n")
+        return None
 
-        result = records_collection.update_one({"pid": pid}, {"$set": update_dict})
 
-        if result.modified_count > 0:
-            updated_doc = records_collection.find_one({"pid": pid})
+# NOTE: Bulk write helpers
 
-            if updated_doc and "_id" in dict(updated_doc).keys():
-                updated_doc["_id"] = str(updated_doc["_id"])
-            return updated_doc
 
+async def settle(pid: str, scope: dict | None, write) -> dict | str | None:
+    """
+    Run one record's `find_one_and_*` for a bulk request and return the document it
+    matched, else `NOT_FOUND` / `FORBIDDEN` (or `None` if the write failed).
+    """
+    try:
+        doc = await write(scoped({"pid": pid}, scope))
+        return doc if doc is not None else await write_failure(pid, scope)
+    except errors.PyMongoError as e:
+        print(f"\nError writing patient record [PID : {pid}] : {e}\n")
         return None
+
+
+# NOTE: UPDATE operations
+def update_document(updates: PatientUpdate) -> dict:
+    """Storage form of the fields set on a patient update."""
+    update_dict = updates.model_dump(exclude_unset=True)
+
+    if "date_of_admission" in update_dict and update_dict["date_of_admission"]:
+        update_dict["date_of_admission"] = str(update_dict["date_of_admission"])
+
+    if "date_of_discharge" in update_dict and update_dict["date_of_discharge"]:
+        update_dict["date_of_discharge"] = str(update_dict["date_of_discharge"])
+
+    return update_dict
+
+
+def record_filter(pid: str, scope: dict | None, version: int | None) -> dict:
+    """Filter matching record `pid` only if it is in scope and (optionally) at `version`."""
+    query: dict = {"pid": pid}
+    if version is not None:
+        query["version"] = version
+    return scoped(query, scope)
+
+
+async def write_failure(pid: str, scope: dict | None) -> str:
+    """Explain why a conditional write matched nothing (only runs on that path)."""
+    projection: dict = {"_id": 0, "version": 1}
+    projection.update({field: 1 for field in scope or {}})
+
+    doc = await records_collection.find_one({"pid": pid}, projection)
+    if doc is None:
+        return NOT_FOUND
+    if any(doc.get(k) != v for k, v in (scope or {}).items()):
+        return FORBIDDEN
+    return VERSION_MISMATCH
+
+
+async def update_patient(
+    pid: str,
+    updates: PatientUpdate,
+    scope: dict | None = None,
+    expected_version: int | None = None,
+) -> dict | str | None:
+    """
+    Update a patient record by PID in a single round trip and return the new document.
+    Returns `NOT_FOUND`, `FORBIDDEN` or `VERSION_MISMATCH` if nothing matched.
+    """
+    if records_collection is None:
+        return None
+
+    try:
+        update_dict = update_document(updates)
+
+        # NOTE: The old document is returned (and patched locally) for the census
+        previous_doc = await records_collection.find_one_and_update(
+            record_filter(pid, scope, expected_version),
+            {"$set": update_dict, "$inc": {"version": 1}},
+            {"_id": 0},
+            return_document=ReturnDocument.BEFORE,
+        )
+
+        if previous_doc is None:
+            return await write_failure(pid, scope)
+
+        updated_doc: dict = {
+            **previous_doc,
+            **update_dict,
+            "version": previous_doc.get("version", 0) + 1,
+        }
+
+        if "name" in update_dict:
+            name_index.add(pid, updated_doc["name"])
+        await records_changed(pid)
+
+        census = CensusDelta()
+        census.record(previous_doc, -1)
+        census.record(updated_doc)
+        await apply_census(census)
+        return updated_doc
     except Exception as e:
         print(f"\nError updating patient record [PID : {pid}] : {e}\n")
         return None
 
 
+async def update_patients(
+    updates: list[PatientUpdate], scope: dict | None = None
+) -> list[dict] | None:
+    """
+    Update patient records in bulk, concurrently, each in a single round trip.
+    Returns one outcome per update : `status` is `updated`, `not_found`,
+    `forbidden` (outside the caller's scope) or `error`.
+    """
+    if records_collection is None:
+        return None
+
+    # NOTE: One `find_one_and_update` per record (run concurrently) rather than a
+    # `bulk_write`, whose counts can't tell which records a write actually matched
+    update_dicts: list[dict] = [update_document(update) for update in updates]
+    previous_docs = await asyncio.gather(
+        *[
+            settle(
+                update.pid,
+                scope,
+                lambda query, update_dict=update_dict: (
+                    records_collection.find_one_and_update(
+                        query,
+                        {"$set": update_dict, "$inc": {"version": 1}},
+                        {"_id": 0},
+                        return_document=ReturnDocument.BEFORE,
+                    )
+                ),
+            )
+            for update, update_dict in zip(updates, update_dicts)
+        ]
+    )
+
+    outcomes: list[dict] = []
+    applied: list[str] = []
+    links: dict[str, str] = {}
+    census = CensusDelta()
+
+    for update, update_dict, previous_doc in zip(updates, update_dicts, previous_docs):
+        outcome: dict = {"pid": update.pid}
+        outcomes.append(outcome)
+
+        if previous_doc is None:
+            outcome["status"] = "error"
+            continue
+        if isinstance(previous_doc, str):
+            outcome["status"] = previous_doc
+            continue
+
+        outcome.update(status="updated", name=previous_doc.get("name", "Unknown"))
+        applied.append(update.pid)
+        if "name" in update_dict:
+            outcome["name"] = update_dict["name"]
+            name_index.add(update.pid, update_dict["name"])
+        if update_dict.get("email"):
+            links[update_dict["email"]] = update.pid
+        census.record(previous_doc, -1)
+        census.record({**previous_doc, **update_dict})
+
+    if applied:
+        await records_changed(*applied)
+        await apply_census(census)
+
+    try:
+        await link_users_to_patients(links)
+    except errors.PyMongoError as e:
+        print(f"\nError linking users to patient records : {e}\n")
+
+    return outcomes
+
+
 # NOTE: DELETE operations
-def delete_patient(pid: str) -> bool:
-    """Delete a patient record by PID."""
+async def delete_patient(
+    pid: str, scope: dict | None = None, expected_version: int | None = None
+) -> dict | str | None:
+    """
+    Delete a patient record by PID in a single round trip and return its `name`.
+    Returns `NOT_FOUND`, `FORBIDDEN` or `VERSION_MISMATCH` if nothing matched.
+    """
     if records_collection is None:
-        return False
+        return None
 
     try:
-        result = records_collection.delete_one({"pid": pid})
-        return result.deleted_count > 0
+        result = await records_collection.find_one_and_delete(
+            record_filter(pid, scope, expected_version),
+            {
+                "_id": 0,
+                "name": 1,
+                "city": 1,
+                "date_of_admission": 1,
+                "date_of_discharge": 1,
+            },
+        )
+        if result is None:
+            return await write_failure(pid, scope)
+
+        if result.get("date_of_admission"):
+            recent_admissions.remove(result["date_of_admission"])
+        name_index.remove(pid)
+        await records_changed(pid)
+
+        # NOTE: Removing a patient who is still admitted discharges them today
+        if not result.get("date_of_discharge"):
+            census = CensusDelta()
+            census.discharge(result, today())
+            await apply_census(census)
+        return result
     except Exception as e:
         print(f"\nError deleting patient record [PID: {pid}] : {e}\n")
-        return False
+        return None
+
+
+async def delete_patients(
+    pids: list[str], scope: dict | None = None
+) -> list[dict] | None:
+    """
+    Delete patient records in bulk, concurrently, each in a single round trip.
+    Returns one outcome per PID : `status` is `discharged`, `not_found`,
+    `forbidden` (outside the caller's scope) or `error`.
+    """
+    if records_collection is None:
+        return None
+
+    # NOTE: Per record, as for updates, so a record deleted by another request in
+    # the meantime reports `not_found` (and isn't discharged from the census twice)
+    fields: dict = {"_id": 0, "name": 1, "city": 1}
+    fields.update({"date_of_admission": 1, "date_of_discharge": 1})
+    docs = await asyncio.gather(
+        *[
+            settle(
+                pid,
+                scope,
+                lambda query: records_collection.find_one_and_delete(query, fields),
+            )
+            for pid in pids
+        ]
+    )
+
+    outcomes: list[dict] = []
+    applied: list[str] = []
+    census = CensusDelta()
+
+    for pid, doc in zip(pids, docs):
+        outcome: dict = {"pid": pid}
+        outcomes.append(outcome)
+
+        if doc is None:
+            outcome["status"] = "error"
+            continue
+        if isinstance(doc, str):
+            outcome["status"] = doc
+            continue
+
+        outcome.update(status="discharged", name=doc.get("name", "Unknown"))
+        applied.append(pid)
+        if doc.get("date_of_admission"):
+            recent_admissions.remove(doc["date_of_admission"])
+        name_index.remove(pid)
+        if not doc.get("date_of_discharge"):
+            census.discharge(doc, today())
+
+    if applied:
+        await records_changed(*applied)
+        await apply_census(census)
+    return outcomes
 
 
 # NOTE: ACTIVITY logging
 activity_collection = None
+activity_writer: ActivityWriter | None = None
+activity_archiver: ActivityArchiver | None = None
+
+# NOTE: Live feed of logged activities (see `/activities/stream`)
+activity_hub = ActivityHub(
+    buffer_size=ACTIVITY_STREAM_BUFFER_SIZE, replay_size=ACTIVITY_STREAM_REPLAY_SIZE
+)
 
 if client is not None and db is not None:
     try:
         activity_collection = db[ACTIVITES_COLLECTION]
+
+        # NOTE: Audit rows are batched off the request path with a relaxed write concern
+        activity_writer = ActivityWriter(
+            activity_collection.with_options(
+                write_concern=WriteConcern(w=ACTIVITY_WRITE_CONCERN_W, j=False)
+            ),
+            max_size=ACTIVITY_QUEUE_MAX_SIZE,
+            batch_size=ACTIVITY_BATCH_SIZE,
+            flush_interval=ACTIVITY_FLUSH_INTERVAL_SECONDS,
+            overflow=ACTIVITY_OVERFLOW_POLICY,
+            spill_path=ACTIVITY_SPILL_PATH,
+        )
+
+        if ACTIVITY_RETENTION_DAYS > 0 and not ACTIVITY_ARCHIVE_DIR:
+            print(
+                "\nWarning: ACTIVITY_RETENTION_DAYS is set without ACTIVITY_ARCHIVE_DIR, "
+                "activities will not be archived.\n"
+            )
+        elif ACTIVITY_RETENTION_DAYS > 0:
+            activity_archiver = ActivityArchiver(
+                activity_collection,
+                counters_collection,
+                directory=ACTIVITY_ARCHIVE_DIR,
+                retention_days=ACTIVITY_RETENTION_DAYS,
+                batch_size=ACTIVITY_ARCHIVE_BATCH_SIZE,
+                interval=ACTIVITY_ARCHIVE_INTERVAL_SECONDS,
+            )
     except Exception as e:
         print(f"\nError setting up activities collection: {e}\n")
 
 
-def log_activity(
+async def start_activity_writer() -> None:
+    if activity_writer is not None:
+        await activity_writer.start()
+
+
+async def stop_activity_writer() -> None:
+    """Flush queued activity entries (called on application shutdown)."""
+    if activity_writer is not None:
+        await activity_writer.stop()
+
+
+async def start_activity_archiver() -> None:
+    if activity_archiver is not None:
+        await activity_archiver.start()
+
+
+async def stop_activity_archiver() -> None:
+    if activity_archiver is not None:
+        await activity_archiver.stop()
+
+
+async def archive_activities() -> int | None:
+    """
+    Run one archive pass now. Returns how many entries moved to the archive, or
+    `None` if retention is off or another worker is archiving.
+    """
+    if activity_archiver is None:
+        return None
+
+    try:
+        return await activity_archiver.run_once(release=True)
+    except Exception as e:
+        print(f"\nError archiving activities : {e}\n")
+        return None
+
+
+def activity_document(
+    action_type: str,
+    patient_id: str = "",
+    patient_name: str = "",
+    description: str = "",
+) -> dict:
+    """Storage form of an activity log entry."""
+    return {
+        # NOTE: Assigned up front, so live feeds can use it as the event ID
+        "_id": ObjectId(),
+        "action_type": action_type,
+        "patient_id": patient_id,
+        "patient_name": patient_name,
+        "description": description,
+        # NOTE: Stored as a BSON date (UTC), shown in `TIMEZONE` by `activity_view`
+        "timestamp": datetime.now(tz=timezone.utc),
+    }
+
+
+def activity_view(doc: dict) -> dict:
+    """Response form of an activity : string `id`, timestamp as ISO 8601 in `TIMEZONE`."""
+    view: dict = {k: v for k, v in doc.items() if k != "_id"}
+    if "_id" in doc:
+        view["id"] = str(doc["_id"])
+
+    timestamp = doc.get("timestamp")
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        view["timestamp"] = timestamp.astimezone(tz(TIMEZONE)).isoformat()
+
+    return view
+
+
+async def log_activity(
     action_type: str,
     patient_id: str = "",
     patient_name: str = "",
     description: str = "",
 ) -> bool:
-    """Log an activity to the activity collection."""
+    """
+    Log an activity to the activity collection.
+    Queued on the background writer while it runs, written directly otherwise (e.g. scripts).
+    """
     if activity_collection is None:
         return False
 
     try:
-        activity_doc = {
-            "action_type": action_type,
-            "patient_id": patient_id,
-            "patient_name": patient_name,
-            "description": description,
-            "timestamp": str(datetime.now(tz=tz(TIMEZONE)).isoformat()),
-        }
-        result = activity_collection.insert_one(activity_doc)
-        return result.inserted_id is not None
+        activity_doc = activity_document(
+            action_type, patient_id, patient_name, description
+        )
+        if activity_writer is not None and activity_writer.running:
+            accepted = await activity_writer.submit(activity_doc)
+        else:
+            result = await activity_collection.insert_one(activity_doc)
+            accepted = result.inserted_id is not None
+
+        if accepted:
+            activity_hub.publish(activity_doc)
+        return accepted
     except Exception as e:
         print(f"\nError logging activity: {e}\n")
         return False
 
 
-def get_recent_activities(limit: int = 10) -> list[dict] | None:
+async def log_activities(entries: list[dict]) -> int:
+    """
+    Log several activities at once (`log_activity` keyword arguments per entry).
+    Returns how many were accepted.
+    """
+    if activity_collection is None or not entries:
+        return 0
+
+    try:
+        docs = [activity_document(**entry) for entry in entries]
+        if activity_writer is not None and activity_writer.running:
+            docs = [doc for doc in docs if await activity_writer.submit(doc)]
+        else:
+            await activity_collection.insert_many(docs, ordered=False)
+
+        for doc in docs:
+            activity_hub.publish(doc)
+        return len(docs)
+    except Exception as e:
+        print(f"\nError logging activities: {e}\n")
+        return 0
+
+
+async def get_recent_activities(limit: int = 10) -> list[dict] | None:
     """Retrieve recent activities sorted by timestamp (newest first)."""
+    return await get_activities(limit)
+
+
+async def get_activities(
+    limit: int,
+    patient_id: str | None = None,
+    action_type: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    after: tuple[datetime, ObjectId] | None = None,
+) -> list[dict] | None:
+    """
+    Retrieve activities newest first, optionally for one patient / action type and
+    within `since` (inclusive) .. `until` (exclusive).
+    With `after`, returns the page following that `(timestamp, _id)` position.
+    """
+    if activity_collection is None:
+        return None
+
+    query: dict = {}
+    if patient_id is not None:
+        query["patient_id"] = patient_id
+    if action_type is not None:
+        query["action_type"] = action_type
+    if since is not None or until is not None:
+        query["timestamp"] = {}
+        if since is not None:
+            query["timestamp"]["$gte"] = since
+        if until is not None:
+            query["timestamp"]["$lt"] = until
+
+    # NOTE: Keyset on (timestamp, _id), served by the `<filter>_timestamp` indexes
+    if after is not None:
+        timestamp, oid = after
+        position: dict = {
+            "$or": [
+                {"timestamp": {"$lt": timestamp}},
+                {"timestamp": timestamp, "_id": {"$lt": oid}},
+            ]
+        }
+        query = {"$and": [query, position]} if query else position
+
+    try:
+        results = (
+            await activity_collection.find(query)
+            .sort([("timestamp", -1), ("_id", -1)])
+            .limit(limit)
+            .to_list()
+        )
+        return [activity_view(doc) for doc in results]
+    except Exception as e:
+        print(f"\nError fetching activities: {e}\n")
+        return None
+
+
+async def get_activities_after(last_id: ObjectId, limit: int) -> list[dict] | None:
+    """
+    Retrieve up to `limit` activities logged after the one with ID `last_id`, oldest
+    first (for resuming a live feed). Returns `None` if that entry isn't stored.
+    """
     if activity_collection is None:
         return None
 
     try:
-        results = list(
-            activity_collection.find({}, {"_id": 0}).sort("timestamp", -1).limit(limit)
+        last = await activity_collection.find_one({"_id": last_id}, {"timestamp": 1})
+        if last is None:
+            return None
+
+        results = (
+            await activity_collection.find(
+                {
+                    "$or": [
+                        {"timestamp": {"$gt": last["timestamp"]}},
+                        {"timestamp": last["timestamp"], "_id": {"$gt": last_id}},
+                    ]
+                }
+            )
+            .sort([("timestamp", 1), ("_id", 1)])
+            .limit(limit)
+            .to_list()
         )
         return results
     except Exception as e:
-        print(f"\nError fetching recent activities: {e}\n")
+        print(f"\nError fetching activities after [{last_id}] : {e}\n")
+        return None
+
+
+async def get_archived_activities(
+    start: date,
+    end: date,
+    limit: int,
+    patient_id: str | None = None,
+    action_type: str | None = None,
+    after: tuple[str, int] | None = None,
+) -> tuple[list[dict], tuple[str, int] | None] | None:
+    """
+    Retrieve archived activities for days `start`..`end` (oldest first), read
+    straight from the archive segments. Returns the page and the position after it.
+    """
+    if not ACTIVITY_ARCHIVE_DIR:
+        return [], None
+
+    match: dict = {}
+    if patient_id is not None:
+        match["patient_id"] = patient_id
+    if action_type is not None:
+        match["action_type"] = action_type
+
+    try:
+        docs, position = await asyncio.to_thread(
+            scan_segments, ACTIVITY_ARCHIVE_DIR, start, end, match, limit, after
+        )
+        return [activity_view(doc) for doc in docs], position
+    except Exception as e:
+        print(f"\nError reading activity archive : {e}\n")
         return None
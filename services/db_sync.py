@@ -0,0 +1,67 @@
+"""
+DB integration - Blocking wrappers
+
+- Synchronous counterparts of the `services.db` functions for scripts and the REPL.
+- Every call is run to completion on a private event loop thread, since the
+  shared `AsyncMongoClient` must always be driven from one loop.
+- Not meant to be imported by the app itself (the routes await `services.db` directly).
+"""
+
+import asyncio
+from functools import wraps
+from threading import Thread
+from typing import Any, Awaitable, Callable, TypeVar
+
+from services import db
+
+T = TypeVar("T")
+
+_loop = asyncio.new_event_loop()
+Thread(target=_loop.run_forever, name="db-sync-loop", daemon=True).start()
+
+
+def _blocking(func: Callable[..., Awaitable[T]]) -> Callable[..., T]:
+    """Wrap an async DB function into a blocking call."""
+
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        return asyncio.run_coroutine_threadsafe(func(*args, **kwargs), _loop).result()
+
+    return wrapper
+
+
+# NOTE: Auth helpers
+get_user_by_username = _blocking(db.get_user_by_username)
+get_user_by_email = _blocking(db.get_user_by_email)
+create_user = _blocking(db.create_user)
+user_exists = _blocking(db.user_exists)
+update_user = _blocking(db.update_user)
+set_user_active = _blocking(db.set_user_active)
+set_user_role = _blocking(db.set_user_role)
+
+# NOTE: CRUD operation handlers
+add_patient = _blocking(db.add_patient)
+add_patients = _blocking(db.add_patients)
+get_all_patients = _blocking(db.get_all_patients)
+get_patient_by_id = _blocking(db.get_patient_by_id)
+get_patient_version = _blocking(db.get_patient_version)
+get_records_change_count = _blocking(db.get_records_change_count)
+get_census = _blocking(db.get_census)
+rebuild_census = _blocking(db.rebuild_census)
+get_patients_by_name = _blocking(db.get_patients_by_name)
+get_patients_by_name_fuzzy = _blocking(db.get_patients_by_name_fuzzy)
+sort_records_by_param = _blocking(db.sort_records_by_param)
+get_recent_admissions = _blocking(db.get_recent_admissions)
+count_recent_admissions = _blocking(db.count_recent_admissions)
+update_patient = _blocking(db.update_patient)
+update_patients = _blocking(db.update_patients)
+delete_patient = _blocking(db.delete_patient)
+delete_patients = _blocking(db.delete_patients)
+
+# NOTE: ACTIVITY logging
+log_activity = _blocking(db.log_activity)
+log_activities = _blocking(db.log_activities)
+get_recent_activities = _blocking(db.get_recent_activities)
+get_activities = _blocking(db.get_activities)
+get_archived_activities = _blocking(db.get_archived_activities)
+archive_activities = _blocking(db.archive_activities)
@@ -0,0 +1,43 @@
+"""
+Leases
+
+- Time-bounded locks kept as documents in a Mongo collection, so only one
+  worker runs a job (archiving, census rebuilds, migrations) at a time.
+- A holder that dies loses its lease once it expires : `seconds` must outlast
+  the job, or be renewed by acquiring again while it runs.
+"""
+
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument, errors
+
+
+def lease_holder() -> str:
+    """This worker's name as a lease holder."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def acquire_lease(collection, lease_id: str, holder: str, seconds: float) -> bool:
+    """Take (or renew) lease `lease_id` for `seconds`. `False` if someone else holds it."""
+    now = datetime.now(tz=timezone.utc)
+    try:
+        lease = await collection.find_one_and_update(
+            {"_id": lease_id, "$or": [{"until": {"$lt": now}}, {"holder": holder}]},
+            {"$set": {"holder": holder, "until": now + timedelta(seconds=seconds)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except errors.DuplicateKeyError:
+        # NOTE: Held by another worker (the upsert collided with its lease)
+        return False
+    return lease is not None
+
+
+async def release_lease(collection, lease_id: str, holder: str) -> None:
+    """Hand lease `lease_id` back early, if `holder` still has it."""
+    await collection.update_one(
+        {"_id": lease_id, "holder": holder},
+        {"$set": {"until": datetime.now(tz=timezone.utc)}},
+    )
@@ -0,0 +1,427 @@
+"""
+Migrations
+
+- Declarative, versioned index spec for the records, users and activities collections.
+- Applied idempotently on startup (`RUN_MIGRATIONS_ON_STARTUP`) or from the CLI :
+  `python -m services.migrations`
+- One worker migrates at a time (under a lease in the migrations collection),
+  the others wait for it and then find nothing pending.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from time import perf_counter
+from typing import Awaitable, Callable
+
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne, errors
+from pytz import timezone as tz
+
+from config.constants import (
+    ACTIVITES_COLLECTION,
+    BULK_CHUNK_SIZE,
+    COUNTERS_COLLECTION,
+    MIGRATIONS_COLLECTION,
+    RECORDS_COLLECTION,
+    TIMEZONE,
+    USERS_COLLECTION,
+)
+from services import db as database
+from services.leases import acquire_lease, lease_holder, release_lease
+from services.pid_allocator import PID_DIGITS, PID_PREFIX, parse_pid
+from utils.utils import sort_fields
+
+LEASE_ID: str = "lock"
+# NOTE: Renewed after every version, so it only has to outlast the slowest one
+LEASE_SECONDS: float = 600
+LEASE_POLL_SECONDS: float = 1
+# NOTE: Long enough for a crashed holder's lease to lapse, then startup gives up
+LEASE_WAIT_SECONDS: float = LEASE_SECONDS + 300
+
+
+@dataclass(frozen=True)
+class Migration:
+    """A schema version : an optional data step followed by the indexes it declares."""
+
+    version: int
+    description: str
+    indexes: dict[str, list[IndexModel]] = field(default_factory=dict)
+    run: Callable[[], Awaitable[None]] | None = None
+
+
+# NOTE: Data steps
+
+
+async def normalize_user_emails() -> None:
+    """Lower-case and trim stored user emails so lookups can match them exactly."""
+    await database.db[USERS_COLLECTION].update_many(
+        {"email": {"$type": "string"}},
+        [{"$set": {"email": {"$toLower": {"$trim": {"input": "$email"}}}}}],
+    )
+
+
+async def normalize_record_emails() -> None:
+    """Lower-case and trim stored patient emails so record scoping can match them exactly."""
+    await database.db[RECORDS_COLLECTION].update_many(
+        {"email": {"$type": "string"}},
+        [{"$set": {"email": {"$toLower": {"$trim": {"input": "$email"}}}}}],
+    )
+
+
+async def link_users_to_patients() -> None:
+    """Backfill `users.pid` from the patient record sharing each unlinked user's email."""
+    await database.db[USERS_COLLECTION].aggregate(
+        [
+            {"$match": {"pid": None, "email": {"$type": "string"}}},
+            {
+                "$lookup": {
+                    "from": RECORDS_COLLECTION,
+                    "localField": "email",
+                    "foreignField": "email",
+                    "pipeline": [
+                        {"$sort": {"pid": 1}},
+                        {"$limit": 1},
+                        {"$project": {"_id": 0, "pid": 1}},
+                    ],
+                    "as": "record",
+                }
+            },
+            {"$match": {"record": {"$ne": []}}},
+            {"$project": {"pid": {"$first": "$record.pid"}}},
+            {
+                "$merge": {
+                    "into": USERS_COLLECTION,
+                    "on": "_id",
+                    "whenMatched": "merge",
+                    "whenNotMatched": "discard",
+                }
+            },
+        ]
+    )
+
+
+async def widen_pid_field(collection_name: str, field_name: str) -> None:
+    """Rewrite legacy `Pxxx` IDs in `field_name` to the fixed-width format."""
+    digits = {"$substrCP": [f"${field_name}", 1, PID_DIGITS]}
+    await database.db[collection_name].update_many(
+        {field_name: {"$regex": f"^{PID_PREFIX}\\d{{1,{PID_DIGITS - 1}}}$"}},
+        [
+            {
+                "$set": {
+                    field_name: {
+                        "$concat": [
+                            PID_PREFIX,
+                            {
+                                "$substrCP": [
+                                    {"$concat": ["0" * PID_DIGITS, digits]},
+                                    {"$strLenCP": digits},
+                                    PID_DIGITS,
+                                ]
+                            },
+                        ]
+                    }
+                }
+            }
+        ],
+    )
+
+
+async def widen_patient_ids() -> None:
+    """Move every PID reference to the wide format and seed the PID sequence."""
+    await widen_pid_field(RECORDS_COLLECTION, "pid")
+    await widen_pid_field(USERS_COLLECTION, "pid")
+    await widen_pid_field(ACTIVITES_COLLECTION, "patient_id")
+
+    last = await database.db[RECORDS_COLLECTION].find_one(
+        {}, {"_id": 0, "pid": 1}, sort=[("pid", -1)]
+    )
+    seq: int = (parse_pid(last["pid"]) or 0) if last else 0
+
+    await database.db[COUNTERS_COLLECTION].update_one(
+        {"_id": "pid"}, {"$max": {"seq": seq}}, upsert=True
+    )
+
+
+async def version_records() -> None:
+    """Start every existing record at version 1 (see `If-Match` on record writes)."""
+    await database.db[RECORDS_COLLECTION].update_many(
+        {"version": {"$exists": False}}, {"$set": {"version": 1}}
+    )
+
+
+async def backfill_census() -> None:
+    """Seed the daily census rollup from the existing records."""
+    await database.rebuild_census()
+
+
+async def date_activity_timestamps() -> None:
+    """Convert ISO string activity timestamps to BSON dates (unparseable ones are kept)."""
+    activities = database.db[ACTIVITES_COLLECTION]
+    operations: list[UpdateOne] = []
+
+    async for doc in activities.find(
+        {"timestamp": {"$type": "string"}}, {"timestamp": 1}, batch_size=BULK_CHUNK_SIZE
+    ):
+        try:
+            timestamp = datetime.fromisoformat(doc["timestamp"])
+        except ValueError:
+            continue
+
+        if timestamp.tzinfo is None:
+            timestamp = tz(TIMEZONE).localize(timestamp)
+        operations.append(
+            UpdateOne({"_id": doc["_id"]}, {"$set": {"timestamp": timestamp}})
+        )
+
+        if len(operations) == BULK_CHUNK_SIZE:
+            await activities.bulk_write(operations, ordered=False)
+            operations = []
+
+    if operations:
+        await activities.bulk_write(operations, ordered=False)
+
+
+# NOTE: Versioned spec (append only - never edit an applied version)
+
+MIGRATIONS: list[Migration] = [
+    Migration(
+        version=1,
+        description="Initial indexes",
+        run=normalize_user_emails,
+        indexes={
+            RECORDS_COLLECTION: [
+                IndexModel([("pid", ASCENDING)], name="pid_unique", unique=True),
+                IndexModel([("name", ASCENDING)], name="name"),
+                IndexModel([("date_of_admission", ASCENDING)], name="date_of_admission"),
+                *[
+                    IndexModel([(f, ASCENDING), ("pid", ASCENDING)], name=f"{f}_pid")
+                    for f in sort_fields
+                ],
+            ],
+            USERS_COLLECTION: [
+                IndexModel(
+                    [("username", ASCENDING)], name="username_unique", unique=True
+                ),
+                IndexModel([("email", ASCENDING)], name="email"),
+            ],
+            ACTIVITES_COLLECTION: [
+                IndexModel([("timestamp", DESCENDING)], name="timestamp"),
+            ],
+        },
+    ),
+    Migration(
+        version=2,
+        description="Patient-scoped record lookups",
+        run=normalize_record_emails,
+        indexes={
+            RECORDS_COLLECTION: [
+                IndexModel([("email", ASCENDING), ("pid", ASCENDING)], name="email_pid"),
+            ],
+        },
+    ),
+    Migration(
+        version=3,
+        description="Link users to their patient records",
+        run=link_users_to_patients,
+        indexes={
+            USERS_COLLECTION: [
+                IndexModel([("pid", ASCENDING)], name="pid", sparse=True),
+            ],
+        },
+    ),
+    Migration(
+        version=4,
+        description="Fixed-width patient IDs allocated from a sequence",
+        run=widen_patient_ids,
+    ),
+    Migration(
+        version=5,
+        description="Record versions for optimistic concurrency",
+        run=version_records,
+    ),
+    Migration(
+        version=6,
+        description="Covering index for summary list views",
+        indexes={
+            # NOTE: Serves `/records/?fields=name,verdict` from the index alone
+            RECORDS_COLLECTION: [
+                IndexModel(
+                    [("pid", ASCENDING), ("name", ASCENDING), ("verdict", ASCENDING)],
+                    name="pid_name_verdict",
+                ),
+            ],
+        },
+    ),
+    Migration(
+        version=7,
+        description="Cohort statistics filters",
+        indexes={
+            RECORDS_COLLECTION: [
+                IndexModel([("verdict", ASCENDING)], name="verdict"),
+                IndexModel([("city", ASCENDING)], name="city"),
+                IndexModel([("gender", ASCENDING), ("age", ASCENDING)], name="gender_age"),
+            ],
+        },
+    ),
+    Migration(
+        version=8,
+        description="Daily census rollup",
+        run=backfill_census,
+    ),
+    Migration(
+        version=9,
+        description="Date-typed activity timestamps and filtered feeds",
+        run=date_activity_timestamps,
+        indexes={
+            ACTIVITES_COLLECTION: [
+                IndexModel(
+                    [("timestamp", DESCENDING), ("_id", DESCENDING)],
+                    name="timestamp_id",
+                ),
+                IndexModel(
+                    [
+                        ("patient_id", ASCENDING),
+                        ("timestamp", DESCENDING),
+                        ("_id", DESCENDING),
+                    ],
+                    name="patient_id_timestamp",
+                ),
+                IndexModel(
+                    [
+                        ("action_type", ASCENDING),
+                        ("timestamp", DESCENDING),
+                        ("_id", DESCENDING),
+                    ],
+                    name="action_type_timestamp",
+                ),
+            ],
+        },
+    ),
+]
+
+
+# NOTE: Runner
+
+
+async def _index_sizes(collection) -> dict[str, int]:
+    """Index sizes (in bytes) of a collection, summed across shards."""
+    sizes: dict[str, int] = {}
+    cursor = await collection.aggregate([{"$collStats": {"storageStats": {}}}])
+    async for stats in cursor:
+        for name, size in stats.get("storageStats", {}).get("indexSizes", {}).items():
+            sizes[name] = sizes.get(name, 0) + int(size)
+    return sizes
+
+
+async def ensure_indexes(collection_name: str, models: list[IndexModel]) -> list[dict]:
+    """Create any missing index from `models` and report on each of them."""
+    collection = database.db[collection_name]
+    existing = await collection.index_information()
+    report: list[dict] = []
+
+    for model in models:
+        name = model.document["name"]
+        entry: dict = {"collection": collection_name, "index": name}
+
+        if name in existing:
+            entry.update(status="exists", took_ms=0.0)
+        else:
+            start = perf_counter()
+            try:
+                await collection.create_indexes([model])
+                entry["status"] = "built"
+            except errors.OperationFailure as e:
+                entry.update(status="failed", error=str(e))
+            entry["took_ms"] = round((perf_counter() - start) * 1000, 2)
+
+        report.append(entry)
+
+    try:
+        sizes = await _index_sizes(collection)
+    except errors.PyMongoError:
+        sizes = {}
+
+    for entry in report:
+        entry["size_bytes"] = sizes.get(entry["index"])
+
+    return report
+
+
+async def run_migrations() -> list[dict]:
+    """
+    Run pending data steps and ensure every declared index exists.
+
+    Safe to call repeatedly : already-applied versions only re-check their indexes.
+    Raises `RuntimeError` if another worker holds the lease past `LEASE_WAIT_SECONDS`.
+    """
+    if database.db is None:
+        print("\nWarning: Skipping migrations, database is not configured.\n")
+        return []
+
+    meta = database.db[MIGRATIONS_COLLECTION]
+    holder: str = lease_holder()
+
+    # NOTE: Another worker is migrating : wait for it, then re-read what's pending
+    deadline: float = perf_counter() + LEASE_WAIT_SECONDS
+    while not await acquire_lease(meta, LEASE_ID, holder, LEASE_SECONDS):
+        if perf_counter() > deadline:
+            raise RuntimeError(
+                f"Timed out after {LEASE_WAIT_SECONDS:.0f}s waiting for another "
+                f"worker's migration lease ('{LEASE_ID}' in '{MIGRATIONS_COLLECTION}')."
+            )
+        await asyncio.sleep(LEASE_POLL_SECONDS)
+
+    try:
+        state = await meta.find_one({"_id": "schema"})
+        applied: int = state["version"] if state else 0
+        report: list[dict] = []
+
+        for migration in MIGRATIONS:
+            pending = migration.version > applied
+
+            if pending and migration.run is not None:
+                await migration.run()
+                # NOTE: Data steps rewrite records, so outstanding ETags must not match
+                await database.records_changed()
+
+            for collection_name, models in migration.indexes.items():
+                report.extend(await ensure_indexes(collection_name, models))
+
+            if pending:
+                await meta.update_one(
+                    {"_id": "schema"},
+                    {
+                        "$set": {
+                            "version": migration.version,
+                            "description": migration.description,
+                            "applied_at": datetime.now(tz=tz(TIMEZONE)).isoformat(),
+                        }
+                    },
+                    upsert=True,
+                )
+                await acquire_lease(meta, LEASE_ID, holder, LEASE_SECONDS)
+
+        return report
+    finally:
+        await release_lease(meta, LEASE_ID, holder)
+
+
+def print_report(report: list[dict]) -> None:
+    for entry in report:
+        size = entry.get("size_bytes")
+        line = (
+            f"{entry['collection']}.{entry['index']} : {entry['status']}"
+            f" ({entry['took_ms']} ms, {size if size is not None else '?'} bytes)"
+        )
+        if "error" in entry:
+            line += f" - {entry['error']}"
+        print(line)
+
+
+if __name__ == "__main__":
+
+    async def main() -> None:
+        print_report(await run_migrations())
+        await database.close_client()
+
+    asyncio.run(main())
@@ -0,0 +1,177 @@
+"""
+Name index
+
+- Per-worker trigram index over patient names for typo-tolerant search.
+- Built at startup from a projected cursor and kept current by the write paths
+  in `services.db`. Writes made by other workers show up on the next rebuild
+  (periodic rebuilds are opt-in, see `NAME_INDEX_REFRESH_SECONDS`).
+- Searches admit a bounded number of candidates, so their cost doesn't grow
+  with the index, and run off the event loop.
+"""
+
+from collections import Counter, defaultdict
+from heapq import nlargest
+from itertools import islice
+from threading import Lock
+
+
+def trigrams(text: str) -> set[str]:
+    """Trigrams of a lower-cased, space-padded name (so short names still match)."""
+    padded = f"  {' '.join(text.lower().split())} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(query: set[str], candidate: set[str]) -> float:
+    """Share of the query's trigrams found in the candidate (so partial names score high)."""
+    if not query:
+        return 0.0
+    return len(query & candidate) / len(query)
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance between two strings."""
+    if len(a) < len(b):
+        a, b = b, a
+
+    # NOTE: Comparisons instead of `min()`, this runs for every re-ranked name
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        left = i
+        for j, cb in enumerate(b, 1):
+            cost = previous[j - 1] + (ca != cb)
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if left + 1 < cost:
+                cost = left + 1
+            current.append(cost)
+            left = cost
+        previous = current
+
+    return previous[-1]
+
+
+def rank(query: str, names: dict[str, str], scores: dict[str, float]) -> list[str]:
+    """
+    Order candidate keys by relevance : exact matches, then substring matches,
+    then by trigram similarity, edit distance and name length.
+    """
+    needle = query.lower().strip()
+
+    def key(k: str) -> tuple:
+        name = names[k].lower()
+        return (
+            name != needle,
+            needle not in name,
+            -scores[k],
+            edit_distance(needle, name),
+            len(name),
+        )
+
+    return sorted(scores, key=key)
+
+
+class TrigramIndex:
+    """
+    Inverted index from name trigrams to PIDs.
+
+    Searches may run on a worker thread while the write paths update the index
+    on the event loop, so both go through `_lock`.
+    """
+
+    def __init__(self, min_similarity: float = 0.3, max_candidates: int = 1000):
+        self.min_similarity = min_similarity
+        self.max_candidates = max(1, max_candidates)
+        self.ready: bool = False
+        self._postings: defaultdict[str, set[str]] = defaultdict(set)
+        self._names: dict[str, str] = {}
+        self._grams: dict[str, set[str]] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, pid: str, name: str) -> None:
+        """Index (or re-index) the name of record `pid`."""
+        grams = trigrams(name)
+        with self._lock:
+            self._remove(pid)
+            self._names[pid] = name
+            self._grams[pid] = grams
+            for gram in grams:
+                self._postings[gram].add(pid)
+
+    def remove(self, pid: str) -> None:
+        with self._lock:
+            self._remove(pid)
+
+    def replace(self, other: "TrigramIndex") -> None:
+        """Swap in a freshly built index."""
+        with self._lock:
+            self._postings, self._names, self._grams = (
+                other._postings,
+                other._names,
+                other._grams,
+            )
+            self.ready = True
+
+    def search(self, query: str, limit: int) -> list[str]:
+        """
+        PIDs of the `limit` best matching names, most relevant first. Admits names
+        sharing enough trigrams or containing the query, like the regex fallback.
+        """
+        query_grams = trigrams(query)
+        needle = query.lower()
+
+        with self._lock:
+            shared = self._candidates(query_grams)
+            scores: dict[str, float] = {}
+            substring: set[str] = set()
+
+            for pid, count in shared.items():
+                if needle in self._names[pid].lower():
+                    substring.add(pid)
+                elif count / len(query_grams) < self.min_similarity:
+                    continue
+                scores[pid] = count / len(query_grams)
+
+            # NOTE: Only the top slice is re-ranked with the (costlier) edit distance,
+            # substring hits first since `rank` puts them ahead anyway
+            top = nlargest(
+                limit * 2, scores, key=lambda pid: (pid in substring, scores[pid])
+            )
+            names: dict[str, str] = {pid: self._names[pid] for pid in top}
+
+        return rank(query, names, {pid: scores[pid] for pid in top})[:limit]
+
+    def _candidates(self, grams: set[str]) -> Counter[str]:
+        """
+        How many of `grams` each candidate name shares. Postings are walked rarest
+        first and admit at most `max_candidates` names : commoner grams only count
+        towards the names already admitted, so a search never walks a whole index.
+        """
+        shared: Counter[str] = Counter()
+        postings_by_size = sorted(
+            (self._postings[gram] for gram in grams if gram in self._postings), key=len
+        )
+
+        for postings in postings_by_size:
+            room = self.max_candidates - len(shared)
+            if len(postings) <= room:
+                shared.update(postings)
+                continue
+
+            for pid in shared.keys() & postings:
+                shared[pid] += 1
+            for pid in islice((pid for pid in postings if pid not in shared), room):
+                shared[pid] = 1
+
+        return shared
+
+    def _remove(self, pid: str) -> None:
+        for gram in self._grams.pop(pid, ()):
+            postings = self._postings[gram]
+            postings.discard(pid)
+            if not postings:
+                del self._postings[gram]
+        self._names.pop(pid, None)
@@ -0,0 +1,76 @@
+"""
+Patient ID allocation
+
+- Atomic PID sequence kept in the counters collection.
+- Each worker reserves a block of IDs with a single `$inc`, so most admits
+  need no round trip. IDs left in a block when a worker exits are skipped.
+"""
+
+import asyncio
+
+from pymongo import ReturnDocument
+
+from config.constants import PID_BLOCK_SIZE
+from services import db as database
+
+PID_PREFIX: str = "P"
+PID_DIGITS: int = 7
+
+
+def format_pid(seq: int) -> str:
+    """Fixed-width PID (e.g. `P0000042`), so string order matches numeric order."""
+    return f"{PID_PREFIX}{seq:0{PID_DIGITS}d}"
+
+
+def parse_pid(pid: str) -> int | None:
+    """Sequence number of a PID in either the legacy (`P042`) or wide format."""
+    if not pid.startswith(PID_PREFIX) or not pid[1:].isdigit():
+        return None
+    return int(pid[1:])
+
+
+async def reserve(count: int) -> int | None:
+    """Atomically reserve `count` consecutive sequence numbers and return the first one."""
+    if database.counters_collection is None:
+        return None
+
+    doc = await database.counters_collection.find_one_and_update(
+        {"_id": "pid"},
+        {"$inc": {"seq": count}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc["seq"] - count + 1
+
+
+class PidAllocator:
+    """Hands out PIDs from a locally reserved block, refilling it when exhausted."""
+
+    def __init__(self, block_size: int):
+        self.block_size = max(1, block_size)
+        self._next: int = 0
+        self._end: int = 0
+        self._lock = asyncio.Lock()
+
+    async def next(self) -> str | None:
+        async with self._lock:
+            if self._next >= self._end:
+                start = await reserve(self.block_size)
+                if start is None:
+                    return None
+                self._next, self._end = start, start + self.block_size
+
+            seq = self._next
+            self._next += 1
+
+        return format_pid(seq)
+
+    async def block(self, count: int) -> list[str] | None:
+        """Reserve `count` contiguous PIDs straight from the shared sequence."""
+        start = await reserve(count)
+        if start is None:
+            return None
+        return [format_pid(seq) for seq in range(start, start + count)]
+
+
+pid_allocator = PidAllocator(block_size=PID_BLOCK_SIZE)
@@ -0,0 +1,167 @@
+"""
+Cohort statistics
+
+- Population-level numbers for the records collection, computed inside the
+  database by a single `$facet` aggregation over the (filtered) records.
+- Percentiles use `$percentile` (MongoDB 7.0+). Older servers get the same
+  report without them.
+"""
+
+from pymongo import errors
+
+from services import db as database
+
+AGE_BANDS: list[int] = [0, 18, 30, 45, 60, 75, 150]
+BMI_BANDS: list[float] = [0, 16.0, 17.0, 18.5, 25.0, 30.0, 35.0, 40.0, 1000.0]
+VITALS: list[str] = ["age", "height", "weight", "bmi"]
+PERCENTILES: list[float] = [0.5, 0.9, 0.95]
+
+
+def stats_filter(
+    verdict: str | None = None,
+    city: str | None = None,
+    gender: str | None = None,
+    min_age: int | None = None,
+    max_age: int | None = None,
+) -> dict:
+    """`$match` for the given filters, each one backed by an index (see migration 7)."""
+    query: dict = {}
+
+    if verdict is not None:
+        query["verdict"] = verdict
+    if city is not None:
+        query["city"] = city
+    if gender is not None:
+        query["gender"] = gender
+
+    if min_age is not None or max_age is not None:
+        query["age"] = {}
+        if min_age is not None:
+            query["age"]["$gte"] = min_age
+        if max_age is not None:
+            query["age"]["$lte"] = max_age
+
+    return query
+
+
+def stats_pipeline(match: dict, percentiles: bool) -> list[dict]:
+    def counts(field: str) -> list[dict]:
+        return [
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}},
+        ]
+
+    def bands(field: str, boundaries: list) -> list[dict]:
+        return [
+            {
+                "$bucket": {
+                    "groupBy": f"${field}",
+                    "boundaries": boundaries,
+                    "default": "other",
+                    "output": {"count": {"$sum": 1}},
+                }
+            }
+        ]
+
+    vitals: dict = {"_id": None, "count": {"$sum": 1}}
+    for field in VITALS:
+        vitals[f"avg_{field}"] = {"$avg": f"${field}"}
+        if percentiles:
+            vitals[f"pct_{field}"] = {
+                "$percentile": {
+                    "input": f"${field}",
+                    "p": PERCENTILES,
+                    "method": "approximate",
+                }
+            }
+
+    return [
+        {"$match": match},
+        {
+            "$facet": {
+                "by_verdict": counts("verdict"),
+                "by_city": counts("city"),
+                "by_gender": counts("gender"),
+                "age_bands": bands("age", AGE_BANDS),
+                "bmi_bands": bands("bmi", BMI_BANDS),
+                "vitals": [{"$group": vitals}],
+            }
+        },
+    ]
+
+
+def band_report(buckets: list[dict], boundaries: list) -> list[dict]:
+    """`$bucket` output as `{from, to, count}` ranges (`to` exclusive)."""
+    upper: dict = dict(zip(boundaries, boundaries[1:]))
+    return [
+        {
+            "from": bucket["_id"],
+            "to": upper.get(bucket["_id"]),
+            "count": bucket["count"],
+        }
+        for bucket in buckets
+    ]
+
+
+def stats_report(facets: dict) -> dict:
+    vitals: dict = facets["vitals"][0] if facets["vitals"] else {}
+    summary: dict = {}
+
+    for field in VITALS:
+        average = vitals.get(f"avg_{field}")
+        summary[field] = {"avg": round(average, 2) if average is not None else None}
+        if f"pct_{field}" in vitals:
+            summary[field].update(
+                {
+                    f"p{round(p * 100)}": value
+                    for p, value in zip(PERCENTILES, vitals[f"pct_{field}"])
+                }
+            )
+
+    return {
+        "total": vitals.get("count", 0),
+        "by_verdict": {str(d["_id"]): d["count"] for d in facets["by_verdict"]},
+        "by_city": {str(d["_id"]): d["count"] for d in facets["by_city"]},
+        "by_gender": {str(d["_id"]): d["count"] for d in facets["by_gender"]},
+        "age_bands": band_report(facets["age_bands"], AGE_BANDS),
+        "bmi_bands": band_report(facets["bmi_bands"], BMI_BANDS),
+        "vitals": summary,
+    }
+
+
+# NOTE: Flipped off on the first server that rejects `$percentile` as unknown
+percentiles_supported: bool = True
+# NOTE: "unknown group operator" / "Unrecognized expression"
+UNSUPPORTED_OPERATOR_CODES: tuple[int, ...] = (15952, 168)
+
+
+async def get_record_stats(match: dict, scope: dict | None = None) -> dict | None:
+    """Cohort statistics for the records matching `match`, within the caller's scope."""
+    global percentiles_supported
+
+    if database.records_collection is None:
+        return None
+
+    query: dict = database.scoped(match, scope)
+
+    try:
+        try:
+            cursor = await database.records_collection.aggregate(
+                stats_pipeline(query, percentiles_supported)
+            )
+        except errors.OperationFailure as e:
+            if not percentiles_supported:
+                raise
+            print(f"\nWarning: $percentile unavailable, skipping percentiles : {e}\n")
+            # NOTE: Other failures (timeouts, memory limits ...) only skip them this once
+            if e.code in UNSUPPORTED_OPERATOR_CODES:
+                percentiles_supported = False
+            cursor = await database.records_collection.aggregate(
+                stats_pipeline(query, False)
+            )
+
+        facets: list[dict] = await cursor.to_list()
+        return stats_report(facets[0])
+    except errors.PyMongoError as e:
+        print(f"\nError computing record statistics : {e}\n")
+        return None
@@ -0,0 +1,49 @@
+"""
+Activity archive
+"""
+
+from datetime import date, datetime, timezone
+
+from services.activity_archive import scan_segments, write_segments
+
+DAY = date(2025, 1, 5)
+
+
+def entry(n: int, **fields) -> dict:
+    timestamp = datetime(2025, 1, 5, 6, 0, n % 60, tzinfo=timezone.utc)
+    return {"_id": n, "timestamp": timestamp, "action_type": "create", **fields}
+
+
+def test_pages_resume_after_their_position(tmp_path):
+    write_segments(str(tmp_path), [entry(n) for n in range(5)])
+    write_segments(str(tmp_path), [entry(n) for n in range(5, 8)])
+
+    first, position = scan_segments(str(tmp_path), DAY, DAY, {}, 3)
+    assert [doc["_id"] for doc in first] == [0, 1, 2]
+    assert position == ("2025-01-05", 2)
+
+    rest, position = scan_segments(str(tmp_path), DAY, DAY, {}, 10, position)
+    assert [doc["_id"] for doc in rest] == [3, 4, 5, 6, 7]
+    assert position is None
+
+
+def test_re_archived_entries_are_read_once(tmp_path):
+    write_segments(str(tmp_path), [entry(n) for n in range(3)])
+    write_segments(str(tmp_path), [entry(n) for n in range(1, 4)])
+
+    docs, _ = scan_segments(str(tmp_path), DAY, DAY, {}, 10)
+    assert [doc["_id"] for doc in docs] == [0, 1, 2, 3]
+
+
+def test_match_and_empty_days(tmp_path):
+    write_segments(
+        str(tmp_path), [entry(0, patient_id="P1"), entry(1, patient_id="P2")]
+    )
+
+    docs, _ = scan_segments(str(tmp_path), DAY, DAY, {"patient_id": "P2"}, 10)
+    assert [doc["_id"] for doc in docs] == [1]
+
+    docs, position = scan_segments(
+        str(tmp_path), date(2025, 2, 1), date(2025, 2, 3), {}, 10
+    )
+    assert docs == [] and position is None
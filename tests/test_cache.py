@@ -0,0 +1,69 @@
+"""
+Response cache
+"""
+
+import asyncio
+
+from services import cache as module
+from services.cache import MemoryBackend
+
+
+def test_size_accounting_and_lru_eviction():
+    backend = MemoryBackend(max_bytes=20)
+
+    async def scenario():
+        await backend.set("a", b"123456789", ttl=60)
+        await backend.set("b", b"123456789", ttl=60)
+        assert backend.size_bytes == 20
+
+        await backend.get("a")
+        await backend.set("c", b"1234", ttl=60)
+
+        assert await backend.get("b") is None
+        assert await backend.get("a") == b"123456789"
+        assert backend.size_bytes == 15
+        assert backend.evictions == 1
+
+        await backend.delete("a")
+        assert backend.size_bytes == 5
+        assert len(backend) == 1
+
+    asyncio.run(scenario())
+
+
+def test_oversized_and_zero_ttl_entries_are_skipped():
+    backend = MemoryBackend(max_bytes=10)
+
+    async def scenario():
+        await backend.set("big", b"x" * 20, ttl=60)
+        await backend.set("a", b"1", ttl=0)
+        assert len(backend) == 0
+        assert backend.size_bytes == 0
+
+    asyncio.run(scenario())
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(module, "monotonic", lambda: now[0])
+    backend = MemoryBackend(max_bytes=100)
+
+    async def scenario():
+        await backend.set("a", b"1", ttl=5)
+        assert await backend.get("a") == b"1"
+        now[0] += 5
+        assert await backend.get("a") is None
+        assert backend.size_bytes == 0
+
+    asyncio.run(scenario())
+
+
+def test_counters():
+    backend = MemoryBackend(max_bytes=100)
+
+    async def scenario():
+        assert await backend.counter("gen") == 0
+        assert await backend.incr("gen") == 1
+        assert await backend.counter("gen") == 1
+
+    asyncio.run(scenario())
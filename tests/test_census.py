@@ -0,0 +1,63 @@
+"""
+Daily census
+"""
+
+from services.census import TOTALS_ID, CensusDelta, census_report, city_key, day_of
+
+
+def test_day_of_and_city_key():
+    assert day_of("2025-03-04T10:00:00+05:30") == "2025-03-04"
+    assert day_of(None) is None
+    assert day_of("not a date") is None
+    assert city_key("St. Louis") == "St_ Louis"
+    assert city_key("") == "unknown"
+
+
+def test_delta_groups_incs_per_day_and_totals():
+    delta = CensusDelta()
+    delta.record(
+        {
+            "city": "Pune",
+            "date_of_admission": "2025-01-01",
+            "date_of_discharge": "2025-01-03",
+        }
+    )
+    delta.record({"city": "Pune", "date_of_admission": "2025-01-01"})
+    delta.discharge({"city": "Pune"}, "2025-01-03")
+
+    assert delta.incs["2025-01-01"]["admitted"] == 2
+    assert delta.incs["2025-01-03"]["cities.Pune.discharged"] == 2
+    assert delta.incs[TOTALS_ID]["admitted"] == 2
+    assert len(delta.operations()) == 3
+
+
+def test_retraction_cancels_out():
+    delta = CensusDelta()
+    doc = {"city": "Pune", "date_of_admission": "2025-01-01"}
+    delta.record(doc)
+    delta.record(doc, -1)
+
+    assert delta.operations() == []
+
+
+def test_report_fills_gaps_and_tracks_in_patients():
+    totals = {
+        "admitted": 3,
+        "discharged": 1,
+        "cities": {"Pune": {"admitted": 3, "discharged": 1}},
+    }
+    days = [
+        {"_id": "2025-01-02", "admitted": 1, "cities": {"Pune": {"admitted": 1}}},
+        {"_id": "2025-01-04", "discharged": 1, "cities": {"Pune": {"discharged": 1}}},
+    ]
+    rows = census_report(totals, days, "2025-01-02", "2025-01-04")
+
+    assert [row["date"] for row in rows] == ["2025-01-02", "2025-01-03", "2025-01-04"]
+    # NOTE: 2 admitted before the range, then +1, then -1
+    assert [row["in_patients"] for row in rows] == [3, 3, 2]
+    assert rows[1]["admitted"] == 0
+    assert rows[2]["cities"]["Pune"] == {
+        "admitted": 0,
+        "discharged": 1,
+        "in_patients": 2,
+    }
@@ -0,0 +1,35 @@
+"""
+Rolling counters
+"""
+
+from services.counters import RollingCounter
+
+
+def test_count_drops_events_outside_the_window():
+    counter = RollingCounter(reconcile_every=60)
+    counter.reconcile(["2025-01-03", "2025-01-01", "2025-01-02"])
+
+    assert counter.count("2025-01-02") == 2
+    assert counter.count("2025-01-04") == 0
+
+
+def test_add_and_remove_keep_order():
+    counter = RollingCounter(reconcile_every=60)
+    counter.reconcile(["2025-01-01", "2025-01-03"])
+
+    counter.add("2025-01-02")
+    counter.remove("2025-01-03")
+    counter.remove("2025-01-09")
+
+    assert counter.count("2025-01-01") == 2
+    assert counter.count("2025-01-02") == 1
+
+
+def test_adds_are_ignored_until_reconciled():
+    counter = RollingCounter(reconcile_every=60)
+    assert counter.stale
+
+    counter.add("2025-01-01")
+    counter.reconcile([])
+    assert not counter.stale
+    assert counter.count("2000-01-01") == 0
@@ -0,0 +1,20 @@
+"""
+Pagination cursors
+"""
+
+from utils.utils import decode_cursor, encode_cursor
+
+
+def test_round_trip():
+    position = {"sort_by": "bmi", "value": 22.5, "pid": "P0000042"}
+    cursor = encode_cursor(position)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == position
+
+
+def test_malformed_cursors_decode_to_none():
+    assert decode_cursor("!!not-base64!!") is None
+    assert decode_cursor(encode_cursor({"pid": "P1"})[:-3]) is None
+    # NOTE: Valid JSON that isn't an object
+    assert decode_cursor("WzEsMl0") is None
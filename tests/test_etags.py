@@ -0,0 +1,31 @@
+"""
+ETags
+"""
+
+import pytest
+from fastapi import HTTPException
+
+from utils.utils import changes_etag, check_not_modified, etag_matches, record_etag
+
+
+def test_etag_formats():
+    assert record_etag(3) == '"3"'
+    assert record_etag(None) == '"0"'
+    assert changes_etag(12) == '"c12"'
+
+
+def test_if_none_match_parsing():
+    assert etag_matches('"3"', '"3"')
+    assert etag_matches('"1", W/"3"', '"3"')
+    assert etag_matches("*", '"3"')
+    assert not etag_matches('"2"', '"3"')
+    assert not etag_matches(None, '"3"')
+
+
+def test_not_modified_raises_304_with_etag():
+    with pytest.raises(HTTPException) as raised:
+        check_not_modified('"c4"', '"c4"')
+    assert raised.value.status_code == 304
+    assert raised.value.headers == {"ETag": '"c4"'}
+
+    check_not_modified('"c3"', '"c4"')
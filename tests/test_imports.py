@@ -0,0 +1,33 @@
+"""
+Smoke tests
+
+- Every module imports, and the app is built, without a database configured.
+"""
+
+import importlib
+import pkgutil
+
+import pytest
+
+PACKAGES: list[str] = ["auth", "config", "models", "routes", "services", "utils"]
+
+MODULES: list[str] = sorted(
+    module.name
+    for package in PACKAGES
+    for module in pkgutil.iter_modules(
+        importlib.import_module(package).__path__, f"{package}."
+    )
+)
+
+
+@pytest.mark.parametrize("name", MODULES)
+def test_module_imports(name: str):
+    importlib.import_module(name)
+
+
+def test_app_starts():
+    from main import app
+
+    paths = app.openapi()["paths"]
+    assert "/health" in paths
+    assert "/records/" in paths
@@ -0,0 +1,73 @@
+"""
+Name index
+"""
+
+from services.name_index import TrigramIndex, edit_distance, similarity, trigrams
+
+NAMES: dict[str, str] = {
+    "P1": "Johnny Depp",
+    "P2": "John Smith",
+    "P3": "Jon Snow",
+    "P4": "Priya Kumar",
+}
+
+
+def build() -> TrigramIndex:
+    index = TrigramIndex(min_similarity=0.3)
+    for pid, name in NAMES.items():
+        index.add(pid, name)
+    return index
+
+
+def test_trigrams_and_similarity():
+    assert trigrams("Jo") == {"  j", " jo", "jo "}
+    assert trigrams("John  SMITH") == trigrams("john smith")
+    assert similarity(trigrams("john"), trigrams("johnny depp")) == 0.8
+    assert similarity(set(), trigrams("john")) == 0.0
+    assert edit_distance("jhon", "john") == 2
+
+
+def test_exact_match_ranks_first():
+    assert build().search("John Smith", 10)[0] == "P2"
+
+
+def test_tolerates_typos():
+    assert "P4" in build().search("Priya Kumr", 10)
+
+
+def test_limit():
+    assert len(build().search("john", 1)) == 1
+
+
+def test_remove_and_reindex():
+    index = build()
+    index.remove("P2")
+    assert "P2" not in index.search("John Smith", 10)
+    assert len(index) == 3
+
+    index.add("P3", "Arya Stark")
+    assert "P3" not in index.search("Jon Snow", 10)
+    assert index.search("Arya Stark", 10) == ["P3"]
+
+
+def test_replace_marks_ready():
+    index = TrigramIndex()
+    assert not index.ready
+
+    index.replace(build())
+    assert index.ready
+    assert len(index) == len(NAMES)
+
+
+def test_admits_substring_matches():
+    # NOTE: Shares too few trigrams with "Johnny Depp" to pass on similarity alone
+    assert "P1" in build().search("ohn", 10)
+
+
+def test_candidates_are_capped():
+    index = TrigramIndex(min_similarity=0.3, max_candidates=5)
+    for n in range(50):
+        index.add(f"P{n}", f"John {n}")
+
+    assert len(index.search("John", 50)) <= 5
+    assert len(index.search("John 42", 1)) == 1
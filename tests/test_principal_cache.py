@@ -0,0 +1,49 @@
+"""
+Principal cache
+"""
+
+from auth import principal_cache as module
+from auth.principal_cache import PrincipalCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(module, "monotonic", clock)
+    cache = PrincipalCache(max_size=4, ttl=30)
+
+    cache.put("alice", "user-a")
+    assert cache.get("alice") == "user-a"
+
+    clock.now += 30
+    assert cache.get("alice") is None
+    assert cache.stats()["size"] == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_eviction_and_invalidation():
+    cache = PrincipalCache(max_size=2, ttl=30)
+    cache.put("alice", "a")
+    cache.put("bob", "b")
+    cache.get("alice")
+    cache.put("carol", "c")
+
+    assert cache.get("bob") is None
+    assert cache.get("alice") == "a"
+    assert cache.evictions == 1
+
+    cache.invalidate("alice")
+    assert cache.get("alice") is None
+
+
+def test_disabled_cache_stores_nothing():
+    cache = PrincipalCache(max_size=0, ttl=30)
+    cache.put("alice", "a")
+    assert cache.get("alice") is None
@@ -4,9 +4,16 @@ Utilities
 
 from os import environ
 from dotenv import load_dotenv
-from json import load
+from json import load, dumps, loads
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as B64Error
 
-from services.db import records_collection
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from models.records import PatientRecord
+from services.db import FORBIDDEN, NOT_FOUND, VERSION_MISMATCH
+from services.pid_allocator import pid_allocator
 
 
 load_dotenv()
@@ -15,6 +22,7 @@ load_dotenv()
 FILEPATH: str = environ.get("FILEPATH", "")
 
 sort_fields: list[str] = ["height", "weight", "bmi"]
+record_fields: list[str] = list(PatientRecord.model_fields)
 
 
 # Functions
@@ -28,15 +36,117 @@ def load_data() -> dict[str, dict[str, str | int | float]]:
     return data
 
 
-def new_pid() -> str | None:
-    """For generating a new patient ID."""
-    if records_collection is None:
+def encode_cursor(position: dict) -> str:
+    """For encoding a keyset position into an opaque pagination cursor."""
+    raw: bytes = dumps(position, separators=(",", ":")).encode("utf-8")
+    return urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict | None:
+    """For decoding a pagination cursor. Returns `None` if it is malformed."""
+    try:
+        raw: bytes = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = loads(raw.decode("utf-8"))
+    except (B64Error, UnicodeDecodeError, ValueError):
+        return None
+
+    return position if isinstance(position, dict) else None
+
+
+def parse_fields(fields: str | None) -> list[str] | None:
+    """
+    For reading a `fields=` query param (comma-separated) into a field list,
+    in canonical order. Rejects unknown fields with a 400.
+    """
+    if fields is None:
+        return None
+
+    selected: set[str] = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown: list[str] = sorted(selected - set(record_fields))
+
+    if not selected or unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Invalid field(s) : {', '.join(unknown) or fields!r}. "
+                f"Select from {', '.join(record_fields)}."
+            ),
+        )
+
+    return [field for field in record_fields if field in selected]
+
+
+def validation_message(exc: ValidationError) -> str:
+    """For flattening a validation error into a single-line message."""
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc'])} : {err['msg']}"
+        for err in exc.errors()
+    )
+
+
+def parse_if_match(header: str | None) -> int | None:
+    """
+    For reading the record version out of an `If-Match` header (e.g. `"3"`).
+    Returns `None` when absent or `*`, raises `ValueError` if malformed.
+    """
+    if header is None or header.strip() == "*":
         return None
 
-    last_doc = records_collection.find_one(sort=[("pid", -1)])
+    tag: str = header.strip()
+    if len(tag) < 3 or tag[0] != '"' or tag[-1] != '"' or not tag[1:-1].isdigit():
+        raise ValueError(f"Invalid If-Match header : {header}")
 
-    if last_doc is not None:
-        last_pid: int = int(last_doc["pid"][1:])
-        return f"P{last_pid + 1:03}"
-    else:
-        return "P001"
+    return int(tag[1:-1])
+
+
+def record_etag(version: int | None) -> str:
+    """For building a record's strong ETag from its version."""
+    return f'"{version or 0}"'
+
+
+def changes_etag(changes: int) -> str:
+    """For building a collection listing's strong ETag from the records change count."""
+    return f'"c{changes}"'
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """For checking an `If-None-Match` header (`*` or a list of tags) against an ETag."""
+    if header is None:
+        return False
+
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def check_not_modified(header: str | None, etag: str) -> None:
+    """For answering a conditional GET with a bodiless 304 when the client's copy is current."""
+    if etag_matches(header, etag):
+        raise HTTPException(status_code=304, headers={"ETag": etag})
+
+
+def if_match_version(header: str | None) -> int | None:
+    """For reading an `If-Match` request header, rejecting malformed ones with a 400."""
+    try:
+        return parse_if_match(header)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+def raise_for_write_failure(reason: str, pid: str, action: str) -> None:
+    """For turning a failed conditional write (see `services.db`) into an HTTP error."""
+    if reason == NOT_FOUND:
+        raise HTTPException(status_code=404, detail=f"Patient with ID : '{pid}' not found.")
+    if reason == FORBIDDEN:
+        raise HTTPException(
+            status_code=403, detail=f"You can only {action} your own patient record."
+        )
+    if reason == VERSION_MISMATCH:
+        raise HTTPException(
+            status_code=412,
+            detail=f"Patient record [{pid}] was modified by someone else. Reload and retry.",
+        )
+
+
+async def new_pid() -> str | None:
+    """For generating a new patient ID."""
+    return await pid_allocator.next()